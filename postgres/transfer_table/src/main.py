@@ -1,5 +1,11 @@
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import db_sources as db
 import psycopg.errors
+from psycopg.conninfo import make_conninfo
 
 from transfer_table.src.queries import pg, ddl
 
@@ -11,13 +17,22 @@ class TransferTable:
             from_table: tuple | list,
             to_table: tuple | list,
             owner=None,
-            depth: tuple | list = None
+            depth: tuple | list = None,
+            columns: list = None,
+            filters: list = None,
+            order_by: str | list = None
 
     ):
         """
         :param connection: list[0] - from db, list[1] - to db
         :param from_table: list[0] - schema, list[1] - table
         :param to_table: list[0] - schema, list[1] - table (list may be 1 length)
+        :param columns: переносимые колонки. Таблица назначения создаётся только с ними,
+            порядок колонок - как в исходной таблице. По умолчанию - все колонки
+        :param filters: список SQL-условий на исходную таблицу, объединяются через AND
+            вместе с условием глубины. Например: ["status <> 'deleted'", "region_id IN (1, 2)"]
+        :param order_by: колонка или список колонок, в порядке которых строки записываются
+            в таблицу назначения (кластеризация данных при загрузке)
         """
         self._connection_from, self._connection_to = connection
         self._from_schema, self._from_table = from_table
@@ -44,10 +59,17 @@ class TransferTable:
                 depth_months=depth[1]
             )
             self._depth = depth
-        self._get_data_query = pg.get_data_query.format(
-            table=self._from_table,
-            schema=self._from_schema
-        )
+
+        if columns is None:
+            self._columns = None
+        else:
+            source_columns = self.source_columns
+            unknown_columns = set(columns) - set(source_columns)
+            if unknown_columns:
+                raise AttributeError(f'Ошибка, в исходной таблице нет колонок: {", ".join(sorted(unknown_columns))}')
+            self._columns = [column for column in source_columns if column in columns]
+        self._filters = list(filters or [])
+        self._order_by = [order_by] if isinstance(order_by, str) else list(order_by or [])
 
     @property
     def transfer_status(self):
@@ -77,9 +99,39 @@ class TransferTable:
             res = None
         return res
 
+    @property
+    def source_columns(self):
+        return [
+            row[0] for row in self._connection_from.execute_to_list(
+                pg.get_columns.format(schema=self._from_schema, table=self._from_table)
+            )
+        ]
+
+    @property
+    def columns(self):
+        return self._columns or self.source_columns
+
+    def _build_query(self, schema, table, ordered=True):
+        query = pg.get_data_query.format(
+            columns=', '.join(f'"{column}"' for column in self._columns) if self._columns else '*',
+            schema=schema,
+            table=table
+        )
+        conditions = [self._depth_query.strip()] if self._depth_query else []
+        conditions += self._filters
+        if conditions:
+            query += 'WHERE ' + '\n  AND '.join(f'({condition})' for condition in conditions) + '\n'
+        if ordered and self._order_by:
+            query += 'ORDER BY ' + ', '.join(f'"{column}"' for column in self._order_by) + '\n'
+        return query
+
     @property
     def selection_query(self):
-        return self._get_data_query + self._depth_query
+        return self._build_query(self._from_schema, self._from_table)
+
+    @property
+    def _base_query(self):
+        return self._build_query(self._from_schema, self._from_table, ordered=False)
 
     @property
     def source_ddl(self):
@@ -94,6 +146,8 @@ class TransferTable:
             f'{self._from_schema}.{self._from_table}',
             f'{self._to_schema}.{self._to_table}'
         )
+        if self._columns:
+            ddl_str = ';\n\n'.join(self._narrow_ddl(self._split_statements(ddl_str))) + ';\n'
 
         ddl_str += ddl.add_owner.format(
             table=self._to_table,
@@ -102,6 +156,168 @@ class TransferTable:
         )
         return ddl_str
 
+    @staticmethod
+    def _split_statements(ddl_str):
+        statements, statement, in_quote = [], '', False
+        for char in ddl_str:
+            if char == "'":
+                in_quote = not in_quote
+            if char == ';' and not in_quote:
+                statements.append(statement.strip())
+                statement = ''
+            else:
+                statement += char
+        statements.append(statement.strip())
+        return [statement for statement in statements if statement]
+
+    @staticmethod
+    def _split_items(body):
+        items, item, depth, in_quote = [], '', 0, None
+        for char in body:
+            if in_quote:
+                in_quote = None if char == in_quote else in_quote
+            elif char in ('"', "'"):
+                in_quote = char
+            elif char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif char == ',' and depth == 0:
+                items.append(item.strip())
+                item = ''
+                continue
+            item += char
+        items.append(item.strip())
+        return [item for item in items if item]
+
+    def _narrow_ddl(self, statements):
+        """
+        Удаление из DDL колонок, не вошедших в columns, и зависящих от них ограничений,
+        индексов, триггеров и комментариев. Зависимости определяются по каталогу источника
+        (pg_constraint.conkey, pg_index.indkey, pg_trigger.tgattr), а не по тексту DDL
+        """
+        excluded = [column for column in self.source_columns if column not in self._columns]
+        if not excluded:
+            return statements
+        dependents = set(
+            (kind, name) for kind, name in self._connection_from.execute_to_list(
+                pg.get_column_dependents.format(
+                    schema=self._from_schema,
+                    table=self._from_table
+                ),
+                params={'columns': excluded}
+            )
+        )
+        name_patterns = (
+            ('constraint', r'ALTER TABLE\s+(?:ONLY\s+)?\S+\s+ADD\s+CONSTRAINT\s+("[^"]+"|\S+)'),
+            ('index', r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF NOT EXISTS\s+)?("[^"]+"|\S+)'),
+            ('trigger', r'CREATE\s+(?:OR REPLACE\s+)?(?:CONSTRAINT\s+)?TRIGGER\s+("[^"]+"|\S+)'),
+            ('constraint', r'COMMENT ON CONSTRAINT\s+("[^"]+"|\S+)'),
+            ('index', r'COMMENT ON INDEX\s+("[^"]+"|\S+)'),
+            ('trigger', r'COMMENT ON TRIGGER\s+("[^"]+"|\S+)'),
+        )
+
+        constraint_words = ('PRIMARY', 'UNIQUE', 'CHECK', 'FOREIGN', 'EXCLUDE')
+
+        def object_name(name):
+            return name.split('.')[-1].strip('"')
+
+        result = []
+        for statement in statements:
+            if re.match(r'CREATE\s+(UNLOGGED\s+)?TABLE', statement):
+                start = statement.index('(')
+                depth, end = 0, start
+                for end in range(start, len(statement)):
+                    depth += {'(': 1, ')': -1}.get(statement[end], 0)
+                    if depth == 0:
+                        break
+                items = []
+                for item in self._split_items(statement[start + 1:end]):
+                    words = item.split()
+                    if words[0].upper() == 'CONSTRAINT':
+                        if ('constraint', object_name(words[1])) not in dependents:
+                            items.append(item)
+                    elif words[0].upper() in constraint_words or words[0].strip('"') in self._columns:
+                        items.append(item)
+                statement = statement[:start] + '(\n  ' + ',\n  '.join(items) + '\n' + statement[end:]
+            elif statement.startswith('COMMENT ON COLUMN'):
+                column = re.match(r'COMMENT ON COLUMN\s+(\S+)', statement).group(1).split('.')[-1]
+                if column.strip('"') in excluded:
+                    continue
+            elif any(
+                    (match := re.match(pattern, statement)) and (kind, object_name(match.group(1))) in dependents
+                    for kind, pattern in name_patterns
+            ):
+                continue
+            result.append(statement)
+        return result
+
+    @property
+    def fast_load_ddl(self):
+        """
+        DDL для быстрой загрузки: UNLOGGED таблица без первичного/внешних ключей, индексов и триггеров
+        и отложенные команды, выполняемые после загрузки данных
+        """
+        res = self._connection_from.execute_to_list(
+            ddl.get_ddl_external_query.format(
+                schema=self._from_schema,
+                table=self._from_table
+            )
+        )
+        ddl_str = res[0][0].replace(
+            f'{self._from_schema}.{self._from_table}',
+            f'{self._to_schema}.{self._to_table}'
+        )
+        statements = self._split_statements(ddl_str)
+        if self._columns:
+            statements = self._narrow_ddl(statements)
+
+        result = {'table': '', 'indexes': [], 'constraints': [], 'other': []}
+        for statement in statements:
+            if re.match(r'CREATE\s+(UNLOGGED\s+)?TABLE', statement):
+                result['table'] = re.sub(
+                    r'^CREATE\s+(UNLOGGED\s+)?TABLE', 'CREATE UNLOGGED TABLE', statement
+                ) + ';'
+            elif re.match(r'CREATE\s+(UNIQUE\s+)?INDEX', statement):
+                result['indexes'].append(statement)
+            elif statement.startswith('ALTER TABLE'):
+                result['constraints'].append(statement)
+            else:
+                result['other'].append(statement)
+
+        result['table'] += ddl.add_owner.format(
+            table=self._to_table,
+            schema=self._to_schema,
+            owner=self._owner
+        )
+        return result
+
+    def _finish_fast_load(self, fast_load_ddl, index_workers):
+        # SET LOGGED переписывает таблицу и последовательно перестраивает существующие индексы,
+        # поэтому выполняется до параллельного создания индексов
+        self._connection_to.execute(
+            ddl.set_logged_query.format(
+                schema=self._to_schema,
+                table=self._to_table
+            )
+        )
+        with ThreadPoolExecutor(max_workers=index_workers) as executor:
+            for future in [
+                executor.submit(self._connection_to.execute, statement)
+                for statement in fast_load_ddl['indexes']
+            ]:
+                future.result()
+
+        for statement in fast_load_ddl['constraints'] + fast_load_ddl['other']:
+            self._connection_to.execute(statement)
+
+        self._connection_to.execute(
+            ddl.analyze_query.format(
+                schema=self._to_schema,
+                table=self._to_table
+            )
+        )
+
     def __str__(self):
         table = f"Исходная таблица: {self._from_schema}.{self._from_table}\n"
         to_table = f"Таблица назначения: {self._to_schema}.{self._to_table}\n"
@@ -109,26 +325,513 @@ class TransferTable:
         transfer_status = f"Статус таблицы назначения: {self.transfer_status}\n"
         depth = f"Глубина переноса: {self._depth[1]} месяца, колонка с датой: {self._depth[0]}\n"
         owner = f"Назначенный владелец: {self._owner}\n"
-        return table + to_table + source_status + transfer_status + depth + owner
+        columns = f"Колонки: {', '.join(self._columns) if self._columns else 'все'}\n"
+        filters = f"Фильтры: {' AND '.join(self._filters) if self._filters else 'не заданы'}\n"
+        order_by = f"Порядок записи: {', '.join(self._order_by) if self._order_by else 'не задан'}\n"
+        return table + to_table + source_status + transfer_status + depth + owner + columns + filters + order_by
+
+    @property
+    def source_conninfo(self):
+        conninfo = make_conninfo(
+            host=self._connection_from.host,
+            port=self._connection_from.port,
+            dbname=self._connection_from.database,
+            user=self._connection_from.user,
+            password=self._connection_from.password,
+        )
+        return "'" + conninfo.replace("'", "''") + "'"
 
-    def transfer(self):
+    @property
+    def columns_definition(self):
+        res = self._connection_from.execute_to_list(
+            pg.get_columns_definition.format(
+                schema=self._from_schema,
+                table=self._from_table
+            )
+        )
+        columns = self.columns
+        return ', '.join(definition for column, definition in res if column in columns)
+
+    @property
+    def key_column(self):
+        res = self._connection_from.execute_to_list(
+            pg.get_primary_key.format(
+                schema=self._from_schema,
+                table=self._from_table
+            )
+        )
+        columns = self.columns
+        if len(res) == 1 and res[0][0] in columns:
+            return res[0][0]
+        if self._depth_query and self._depth[0] in columns:
+            return self._depth[0]
+        raise AttributeError(
+            'Ошибка, у таблицы нет первичного ключа из одной колонки и не задана глубина переноса (depth), '
+            'либо они не входят в переносимые колонки (columns)'
+        )
+
+    def _checkpoint_params(self, **kwargs):
+        return {
+            'from_table': f'{self._from_schema}.{self._from_table}',
+            'to_table': f'{self._to_schema}.{self._to_table}',
+            **kwargs
+        }
+
+    def transfer_chunked(self, chunk_size=100000, key_column=None, control_schema='public'):
+        """
+        Перенос частями с постраничной выборкой по ключу (keyset pagination).
+        Каждая часть передаётся через COPY и фиксируется в одной транзакции с контрольной точкой
+        в таблице {control_schema}.transfer_checkpoint БД назначения. При повторном запуске
+        после сбоя перенос продолжается с последней зафиксированной части.
+        Строки с NULL в ключевой колонке не переносятся
+
+        :param chunk_size: количество значений ключа в одной части
+        :param key_column: колонка для разбиения на части. По умолчанию - первичный ключ,
+            либо колонка с датой из depth
+        :param control_schema: схема контрольной таблицы в БД назначения
+        """
         if not self.source_status:
             raise AttributeError('Ошибка, источник данных отсутствует, либо таблица пустая')
 
+        self._connection_to.execute(ddl.create_checkpoint_table.format(schema=control_schema))
+        checkpoint = self._connection_to.execute_to_list(
+            ddl.get_checkpoint.format(schema=control_schema),
+            params=self._checkpoint_params()
+        )
+
+        if checkpoint:
+            key_column, last_value, rows_transferred = checkpoint[0]
+            print(f'Продолжение переноса {self._to_schema}.{self._to_table}: {key_column} > {last_value}\n')
+        else:
+            key_column = key_column or self.key_column
+            last_value, rows_transferred = None, 0
+            self._connection_to.execute(
+                ddl.delete_data_query.format(
+                    schema=self._to_schema,
+                    table=self._to_table
+                )
+            )
+            self._connection_to.execute(
+                self.source_ddl
+            )
+            self._connection_to.execute(
+                ddl.set_checkpoint.format(schema=control_schema),
+                params=self._checkpoint_params(
+                    key_column=key_column,
+                    last_value=last_value,
+                    rows_transferred=rows_transferred
+                )
+            )
+
+        key_type = self._connection_from.execute_to_list(
+            pg.get_column_type.format(
+                schema=self._from_schema,
+                table=self._from_table,
+                column=key_column
+            )
+        )[0][0]
+        query_args = dict(selection_query=self._base_query, key_column=key_column, key_type=key_type)
+
+        with self._connection_from.get_connection() as connection_from, \
+                self._connection_to.get_connection() as connection_to:
+            while True:
+                with connection_from.cursor() as cursor_from:
+                    cursor_from.execute(
+                        pg.get_chunk_upper_bound.format(**query_args),
+                        {'last_value': last_value, 'chunk_size': chunk_size}
+                    )
+                    upper_value = cursor_from.fetchone()[0]
+
+                if upper_value is None:
+                    break
+
+                with connection_from.cursor() as cursor_from, connection_to.cursor() as cursor_to:
+                    with cursor_from.copy(
+                            pg.copy_chunk_to.format(**query_args),
+                            {'last_value': last_value, 'upper_value': upper_value}
+                    ) as copy_from:
+                        with cursor_to.copy(
+                                ddl.copy_chunk_from.format(schema=self._to_schema, table=self._to_table)
+                        ) as copy_to:
+                            for data in copy_from:
+                                copy_to.write(data)
+
+                    rows_transferred += cursor_to.rowcount
+                    cursor_to.execute(
+                        ddl.set_checkpoint.format(schema=control_schema),
+                        self._checkpoint_params(
+                            key_column=key_column,
+                            last_value=upper_value,
+                            rows_transferred=rows_transferred
+                        )
+                    )
+                connection_to.commit()
+                connection_from.rollback()
+
+                last_value = upper_value
+                print(f'{self._to_schema}.{self._to_table}: {key_column} <= {upper_value}, строк: {rows_transferred}')
+
         self._connection_to.execute(
-            ddl.delete_data_query.format(
-                schema=self._to_schema,
-                table=self._to_table
+            ddl.delete_checkpoint.format(schema=control_schema),
+            params=self._checkpoint_params()
+        )
+        print(f'Таблица {self._to_schema}.{self._to_table} создана и наполнена частями\n')
+
+    @property
+    def key_columns(self):
+        res = self._connection_from.execute_to_list(
+            pg.get_primary_key.format(
+                schema=self._from_schema,
+                table=self._from_table
             )
         )
-        self._connection_to.execute(
-            self.source_ddl
+        return [row[0] for row in res]
+
+    def transfer_incremental(self, watermark_column, key_columns=None, overlap=None, control_schema='public'):
+        """
+        Инкрементальный перенос: переносятся только строки с watermark_column больше сохранённой
+        верхней границы (таблица {control_schema}.transfer_watermark БД назначения).
+        Новые строки загружаются через COPY во временную таблицу и сливаются с таблицей назначения:
+        при наличии ключа - INSERT ... ON CONFLICT DO UPDATE, иначе - удаление окна и вставка.
+        Загрузка и сдвиг границы выполняются в одной транзакции
+
+        :param watermark_column: колонка с возрастающим значением (дата/время или id)
+        :param key_columns: колонки ключа для слияния. По умолчанию - первичный ключ источника
+        :param overlap: SQL-выражение окна повторной синхронизации для запоздавших строк,
+            вычитается из границы. Например: "interval '3 days'" или "1000"
+        :param control_schema: схема контрольной таблицы в БД назначения
+        :return: новая граница (текстовое значение watermark_column), сохранённая после загрузки
+        """
+        if not self.source_status:
+            raise AttributeError('Ошибка, источник данных отсутствует, либо таблица пустая')
+
+        if self.transfer_status is None:
+            self._connection_to.execute(self.source_ddl)
+
+        self._connection_to.execute(ddl.create_watermark_table.format(schema=control_schema))
+        res = self._connection_to.execute_to_list(
+            ddl.get_watermark.format(schema=control_schema),
+            params=self._checkpoint_params()
         )
+        watermark = res[0][0] if res else None
+
+        key_columns = self.key_columns if key_columns is None else key_columns
+        columns = self.columns
+        watermark_type = self._connection_from.execute_to_list(
+            pg.get_column_type.format(
+                schema=self._from_schema,
+                table=self._from_table,
+                column=watermark_column
+            )
+        )[0][0]
+        stage_table = f'"{self._to_table}__increment"'
+        query_args = dict(
+            schema=self._to_schema,
+            table=self._to_table,
+            stage_table=stage_table,
+            selection_query=self._base_query,
+            watermark_column=watermark_column,
+            watermark_type=watermark_type,
+            overlap=f' - {overlap}' if overlap else ''
+        )
+        params = {'watermark': watermark}
+
+        with self._connection_from.get_connection() as connection_from, \
+                self._connection_to.get_connection() as connection_to:
+            with connection_from.cursor() as cursor_from, connection_to.cursor() as cursor_to:
+                cursor_to.execute(ddl.create_stage_table.format(**query_args))
+                with cursor_from.copy(pg.copy_increment_to.format(**query_args), params) as copy_from:
+                    with cursor_to.copy(f'COPY {stage_table} FROM STDIN') as copy_to:
+                        for data in copy_from:
+                            copy_to.write(data)
+                rows = cursor_to.rowcount
+
+                if key_columns:
+                    update_columns = [column for column in columns if column not in key_columns]
+                    conflict_action = 'UPDATE SET ' + ', '.join(
+                        f'"{column}" = excluded."{column}"' for column in update_columns
+                    ) if update_columns else 'NOTHING'
+                    cursor_to.execute(
+                        ddl.merge_upsert_query.format(
+                            key_columns=', '.join(f'"{column}"' for column in key_columns),
+                            conflict_action=conflict_action,
+                            **query_args
+                        )
+                    )
+                else:
+                    cursor_to.execute(ddl.merge_delete_query.format(**query_args), params)
+                    cursor_to.execute(ddl.merge_insert_query.format(**query_args))
+
+                cursor_to.execute(
+                    ddl.set_watermark.format(schema=control_schema, **{
+                        key: value for key, value in query_args.items() if key != 'schema'
+                    }),
+                    self._checkpoint_params(watermark_column=watermark_column, watermark=watermark)
+                )
+                new_watermark = cursor_to.fetchone()[0]
+            connection_to.commit()
+
+        print(f'Таблица {self._to_schema}.{self._to_table} обновлена, строк: {rows}, граница: {watermark_column} > {new_watermark}\n')
+        return new_watermark
+
+    def _range_checksum(self, connection, selection_query, key_column, key_type, lower_value, upper_value):
+        res = connection.execute_to_list(
+            pg.get_range_checksum.format(
+                selection_query=selection_query,
+                key_column=key_column,
+                key_type=key_type
+            ),
+            params={'lower_value': lower_value, 'upper_value': upper_value}
+        )
+        return res[0]
+
+    def verify(self, key_column=None, chunks=64, max_workers=4):
+        """
+        Проверка совпадения данных источника и таблицы назначения по диапазонам ключа.
+        Для каждого диапазона на обеих сторонах параллельно вычисляются количество строк
+        и сумма хэшей строк (на стороне БД). Возвращаются только несовпадающие диапазоны,
+        которые можно перенести повторно методом repair
+
+        :param key_column: колонка для разбиения на диапазоны. По умолчанию - первичный ключ,
+            либо колонка с датой из depth
+        :param chunks: количество диапазонов
+        :param max_workers: количество параллельных запросов
+        :return: список несовпадающих диапазонов
+        """
+        key_column = key_column or self.key_column
+        key_type = self._connection_from.execute_to_list(
+            pg.get_column_type.format(
+                schema=self._from_schema,
+                table=self._from_table,
+                column=key_column
+            )
+        )[0][0]
+        bounds = self._connection_from.execute_to_list(
+            pg.get_range_bounds.format(
+                chunks=max(chunks, 2),
+                key_column=key_column,
+                selection_query=self._base_query
+            )
+        )[0][0] or []
+        bounds = [None, *dict.fromkeys(value for value in bounds if value is not None), None]
+        ranges = list(zip(bounds[:-1], bounds[1:]))
+
+        target_query = pg.get_data_query.format(columns='*', schema=self._to_schema, table=self._to_table)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                (
+                    lower_value,
+                    upper_value,
+                    executor.submit(
+                        self._range_checksum, self._connection_from, self._base_query,
+                        key_column, key_type, lower_value, upper_value
+                    ),
+                    executor.submit(
+                        self._range_checksum, self._connection_to, target_query,
+                        key_column, key_type, lower_value, upper_value
+                    ),
+                )
+                for lower_value, upper_value in ranges
+            ]
+            mismatches = []
+            for lower_value, upper_value, source_future, target_future in futures:
+                source_rows, source_hash = source_future.result()
+                target_rows, target_hash = target_future.result()
+                if (source_rows, source_hash) != (target_rows, target_hash):
+                    mismatches.append({
+                        'key_column': key_column,
+                        'key_type': key_type,
+                        'lower_value': lower_value,
+                        'upper_value': upper_value,
+                        'source_rows': source_rows,
+                        'target_rows': target_rows,
+                    })
+
+        print(f'Проверка {self._to_schema}.{self._to_table}: диапазонов {len(ranges)}, несовпадений {len(mismatches)}')
+        for mismatch in mismatches:
+            print(
+                f"| [{mismatch['lower_value']}, {mismatch['upper_value']}) : "
+                f"источник {mismatch['source_rows']}, назначение {mismatch['target_rows']}"
+            )
+        return mismatches
+
+    def repair(self, mismatches):
+        """
+        Повторный перенос диапазонов, найденных методом verify: строки диапазона удаляются
+        из таблицы назначения и загружаются заново через COPY в одной транзакции
 
+        :param mismatches: список диапазонов из verify
+        """
+        with self._connection_from.get_connection() as connection_from, \
+                self._connection_to.get_connection() as connection_to:
+            for mismatch in mismatches:
+                query_args = dict(
+                    schema=self._to_schema,
+                    table=self._to_table,
+                    selection_query=self._base_query,
+                    key_column=mismatch['key_column'],
+                    key_type=mismatch['key_type']
+                )
+                params = {'lower_value': mismatch['lower_value'], 'upper_value': mismatch['upper_value']}
+
+                with connection_from.cursor() as cursor_from, connection_to.cursor() as cursor_to:
+                    cursor_to.execute(ddl.delete_range_query.format(**query_args), params)
+                    with cursor_from.copy(pg.copy_range_to.format(**query_args), params) as copy_from:
+                        with cursor_to.copy(
+                                ddl.copy_chunk_from.format(schema=self._to_schema, table=self._to_table)
+                        ) as copy_to:
+                            for data in copy_from:
+                                copy_to.write(data)
+                connection_to.commit()
+                connection_from.rollback()
+
+    def _transfer_python(self):
         self._data = self._connection_from.execute_to_list(self.selection_query)
         self._connection_to.insert(
             table=self._to_table,
             schema=self._to_schema,
-            values=self._data
+            values=self._data,
+            columns=self._columns
+        )
+
+    def _transfer_dblink(self, fdw_server=None):
+        # Имя внешнего сервера: учётные данные берутся из user mapping и не попадают в текст запроса
+        conninfo = "'" + fdw_server.replace("'", "''") + "'" if fdw_server else self.source_conninfo
+        self._connection_to.execute(
+            ddl.dblink_insert_query.format(
+                schema=self._to_schema,
+                table=self._to_table,
+                conninfo=conninfo,
+                selection_query=self.selection_query,
+                columns_definition=self.columns_definition
+            )
+        )
+
+    def _transfer_fdw(self, fdw_server, fdw_schema):
+        if fdw_server is None:
+            raise AttributeError('Ошибка, не задан сервер postgres_fdw (fdw_server)')
+
+        self._connection_to.execute(
+            ddl.fdw_import_query.format(
+                fdw_schema=fdw_schema,
+                fdw_server=fdw_server,
+                from_schema=self._from_schema,
+                from_table=self._from_table
+            )
         )
+        try:
+            self._connection_to.execute(
+                ddl.fdw_insert_query.format(
+                    schema=self._to_schema,
+                    table=self._to_table,
+                    selection_query=self._build_query(fdw_schema, self._from_table)
+                )
+            )
+        finally:
+            self._connection_to.execute(
+                ddl.fdw_drop_query.format(
+                    fdw_schema=fdw_schema,
+                    from_table=self._from_table
+                )
+            )
+
+    @staticmethod
+    def _put_block(blocks, stop, block):
+        while not stop.is_set():
+            try:
+                blocks.put(block, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_binary(self, blocks, stop):
+        try:
+            with self._connection_from.get_connection() as connection_from:
+                with connection_from.cursor() as cursor:
+                    with cursor.copy(pg.copy_binary_to.format(selection_query=self.selection_query)) as copy:
+                        for data in copy:
+                            if not self._put_block(blocks, stop, bytes(data)):
+                                connection_from.cancel()
+                                return
+        except Exception as e:
+            self._put_block(blocks, stop, e)
+        else:
+            self._put_block(blocks, stop, None)
+
+    def _transfer_pipe(self, buffer_blocks):
+        blocks = queue.Queue(maxsize=buffer_blocks)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._read_binary, args=(blocks, stop), daemon=True)
+        reader.start()
+
+        try:
+            with self._connection_to.get_connection() as connection_to:
+                with connection_to.cursor() as cursor:
+                    with cursor.copy(
+                            ddl.copy_binary_from.format(schema=self._to_schema, table=self._to_table)
+                    ) as copy:
+                        while (data := blocks.get()) is not None:
+                            if isinstance(data, Exception):
+                                raise data
+                            copy.write(data)
+                connection_to.commit()
+        finally:
+            stop.set()
+            reader.join()
+
+    def transfer(
+            self,
+            mode='python',
+            fdw_server=None,
+            fdw_schema='transfer_fdw',
+            buffer_blocks=64,
+            fast_load=False,
+            index_workers=4
+    ):
+        """
+        :param mode: 'python' - данные проходят через Python (execute_to_list + insert),
+            'dblink' - INSERT ... SELECT FROM dblink(...) на стороне БД назначения,
+            'fdw' - INSERT ... SELECT из внешней таблицы postgres_fdw на стороне БД назначения,
+            'pipe' - COPY TO STDOUT (FORMAT BINARY) из источника напрямую в COPY FROM STDIN (FORMAT BINARY)
+            назначения, чтение выполняется в отдельном потоке
+        :param fdw_server: сервер postgres_fdw в БД назначения, указывающий на БД источника
+            (см. postgres/views/foreign_table_create_fdw.sql). Для mode='dblink' используется вместо
+            строки подключения с паролем: учётные данные берутся из user mapping сервера
+        :param fdw_schema: схема в БД назначения для временной внешней таблицы
+        :param buffer_blocks: размер буфера (в блоках COPY) между чтением и записью для mode='pipe'
+        :param fast_load: таблица создаётся UNLOGGED без первичного/внешних ключей, индексов и триггеров;
+            после загрузки таблица переводится в LOGGED, индексы строятся параллельно,
+            добавляются ограничения, триггеры и выполняется ANALYZE
+        :param index_workers: количество параллельно создаваемых индексов при fast_load
+        """
+        if mode not in ('python', 'dblink', 'fdw', 'pipe'):
+            raise AttributeError(f'Ошибка, неизвестный режим переноса: {mode}')
+
+        if not self.source_status:
+            raise AttributeError('Ошибка, источник данных отсутствует, либо таблица пустая')
+
+        self._connection_to.execute(
+            ddl.delete_data_query.format(
+                schema=self._to_schema,
+                table=self._to_table
+            )
+        )
+        fast_load_ddl = self.fast_load_ddl if fast_load else None
+        self._connection_to.execute(
+            fast_load_ddl['table'] if fast_load else self.source_ddl
+        )
+
+        match mode:
+            case 'dblink':
+                self._transfer_dblink(fdw_server=fdw_server)
+            case 'fdw':
+                self._transfer_fdw(fdw_server=fdw_server, fdw_schema=fdw_schema)
+            case 'pipe':
+                self._transfer_pipe(buffer_blocks=buffer_blocks)
+            case _:
+                self._transfer_python()
+
+        if fast_load:
+            self._finish_fast_load(fast_load_ddl, index_workers)
         print(f'Таблица {self._to_schema}.{self._to_table} создана и наполнена\n')
@@ -0,0 +1,161 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import db_sources as db
+
+from transfer_table.src.main import TransferTable
+from transfer_table.src.queries import pg, ddl
+
+
+class TransferPlan:
+    def __init__(
+            self,
+            connection: [db.PostgreSQL, db.PostgreSQL],
+            specs: list,
+            owner=None,
+            max_workers=4,
+            connections_per_db=4,
+            **transfer_kwargs
+    ):
+        """
+        :param connection: list[0] - from db, list[1] - to db
+        :param specs: list of (from_table, to_table) or (from_table, to_table, depth),
+            from_table / to_table / depth - as in TransferTable
+        :param owner: owner of all target tables (default - owner of each source table)
+        :param max_workers: number of tables transferred concurrently
+        :param connections_per_db: max concurrent transfers using the same database
+        :param transfer_kwargs: TransferTable.transfer parameters (mode, fdw_server, ...)
+        """
+        self._connection_from, self._connection_to = connection
+        self._max_workers = max_workers
+        self._transfer_kwargs = transfer_kwargs
+        self._semaphores = {
+            self._db_key(db_): threading.BoundedSemaphore(connections_per_db)
+            for db_ in connection
+        }
+
+        self._transfers = {}
+        for spec in specs:
+            from_table, to_table, *depth = spec
+            transfer = TransferTable(
+                connection=connection,
+                from_table=from_table,
+                to_table=to_table,
+                owner=owner,
+                depth=depth[0] if depth else None
+            )
+            self._transfers[f'{transfer._from_schema}.{transfer._from_table}'] = transfer
+
+        self._parents = self._resolve_dependencies()
+        self._report = {}
+
+    @staticmethod
+    def _db_key(connection):
+        return connection.host, connection.port, connection.database
+
+    def _resolve_dependencies(self):
+        parents = {table: set() for table in self._transfers}
+        for child_table, parent_table in self._connection_from.execute_to_list(pg.get_foreign_keys):
+            if child_table in parents and parent_table in parents:
+                parents[child_table].add(parent_table)
+        return parents
+
+    @property
+    def order(self):
+        """
+        Source tables in foreign key order (parents first)
+        """
+        order, done = [], set()
+        while len(order) < len(self._transfers):
+            ready = [
+                table for table in self._transfers
+                if table not in done and self._parents[table] <= done
+            ]
+            if not ready:
+                raise AttributeError('Ошибка, циклическая зависимость внешних ключей между таблицами плана')
+            order.extend(ready)
+            done.update(ready)
+        return order
+
+    def _run(self, table):
+        transfer = self._transfers[table]
+        semaphores = [
+            self._semaphores[key]
+            for key in sorted({self._db_key(self._connection_from), self._db_key(self._connection_to)})
+        ]
+        for semaphore in semaphores:
+            semaphore.acquire()
+        try:
+            start_time = datetime.now()
+            transfer.transfer(**self._transfer_kwargs)
+            rows = self._connection_to.execute_to_list(
+                pg.count_rows.format(schema=transfer._to_schema, table=transfer._to_table)
+            )[0][0]
+            return rows, datetime.now() - start_time
+        finally:
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+
+    def _drop_targets(self):
+        # Дочерние таблицы удаляются первыми, иначе DROP родительской таблицы упадёт на внешнем ключе
+        for table in reversed(self.order):
+            transfer = self._transfers[table]
+            self._connection_to.execute(
+                ddl.delete_data_query.format(
+                    schema=transfer._to_schema,
+                    table=transfer._to_table
+                )
+            )
+
+    def run(self):
+        order = self.order
+        self._drop_targets()
+        self._report = {}
+        start_time = datetime.now()
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            running = {}
+            pending = list(order)
+
+            while pending or running:
+                for table in list(pending):
+                    parents = self._parents[table]
+                    if any(self._report.get(parent, {}).get('status') in ('error', 'skipped') for parent in parents):
+                        self._report[table] = {'status': 'skipped'}
+                        pending.remove(table)
+                    elif all(self._report.get(parent, {}).get('status') == 'ok' for parent in parents):
+                        running[executor.submit(self._run, table)] = table
+                        pending.remove(table)
+
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    table = running.pop(future)
+                    try:
+                        rows, elapsed = future.result()
+                        self._report[table] = {'status': 'ok', 'rows': rows, 'elapsed': elapsed}
+                    except Exception as e:
+                        self._report[table] = {'status': 'error', 'error': e}
+
+        self.print_report(datetime.now() - start_time)
+        return self._report
+
+    def print_report(self, elapsed_time):
+        print('----')
+        total_rows = 0
+        for table in self.order:
+            info = self._report.get(table, {'status': 'pending'})
+            line = f"| {table:>40} : {info['status']}"
+            if info['status'] == 'ok':
+                seconds = info['elapsed'].total_seconds() or 1e-9
+                line += f", строк: {info['rows']}, время: {info['elapsed']}, строк/с: {info['rows'] / seconds:,.0f}"
+                total_rows += info['rows']
+            elif info['status'] == 'error':
+                line += f", {info['error']!r}"
+            print(line)
+
+        seconds = elapsed_time.total_seconds() or 1e-9
+        print(f"| {'total':>40} : строк: {total_rows}, время: {elapsed_time}, строк/с: {total_rows / seconds:,.0f}")
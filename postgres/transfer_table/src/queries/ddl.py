@@ -1,3 +1,15 @@
+get_ddl_external_query = '''
+select * from public.pg_get_tabledef(
+'{schema}',
+'{table}',
+false,
+'PKEY_EXTERNAL',
+'COMMENTS',
+'FKEYS_EXTERNAL',
+'INCLUDE_TRIGGERS'
+);
+'''
+
 get_ddl_query = '''
 select * from public.pg_get_tabledef(
 '{schema}',
@@ -18,4 +30,134 @@ OWNER TO "{owner}";
 
 delete_data_query = '''
 DROP TABLE IF EXISTS {schema}.{table};
-'''
\ No newline at end of file
+'''
+
+dblink_insert_query = '''
+CREATE EXTENSION IF NOT EXISTS dblink;
+INSERT INTO {schema}.{table}
+SELECT * FROM dblink(
+{conninfo},
+$transfer${selection_query}$transfer$
+) AS t({columns_definition});
+'''
+
+fdw_import_query = '''
+CREATE SCHEMA IF NOT EXISTS "{fdw_schema}";
+DROP FOREIGN TABLE IF EXISTS "{fdw_schema}"."{from_table}";
+IMPORT FOREIGN SCHEMA "{from_schema}" LIMIT TO ("{from_table}")
+FROM SERVER "{fdw_server}" INTO "{fdw_schema}";
+'''
+
+fdw_insert_query = '''
+INSERT INTO {schema}.{table}
+{selection_query};
+'''
+
+fdw_drop_query = '''
+DROP FOREIGN TABLE IF EXISTS "{fdw_schema}"."{from_table}";
+'''
+
+create_checkpoint_table = '''
+CREATE TABLE IF NOT EXISTS "{schema}"."transfer_checkpoint" (
+    from_table text NOT NULL,
+    to_table text NOT NULL,
+    key_column text NOT NULL,
+    last_value text,
+    rows_transferred bigint NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (from_table, to_table)
+);
+'''
+
+get_checkpoint = '''
+SELECT key_column, last_value, rows_transferred
+FROM "{schema}"."transfer_checkpoint"
+WHERE from_table = %(from_table)s AND to_table = %(to_table)s;
+'''
+
+set_checkpoint = '''
+INSERT INTO "{schema}"."transfer_checkpoint" (from_table, to_table, key_column, last_value, rows_transferred)
+VALUES (%(from_table)s, %(to_table)s, %(key_column)s, %(last_value)s, %(rows_transferred)s)
+ON CONFLICT (from_table, to_table) DO UPDATE
+SET key_column = excluded.key_column,
+    last_value = excluded.last_value,
+    rows_transferred = excluded.rows_transferred,
+    updated_at = now();
+'''
+
+delete_checkpoint = '''
+DELETE FROM "{schema}"."transfer_checkpoint"
+WHERE from_table = %(from_table)s AND to_table = %(to_table)s;
+'''
+
+copy_chunk_from = '''
+COPY {schema}.{table} FROM STDIN
+'''
+
+copy_binary_from = '''
+COPY {schema}.{table} FROM STDIN (FORMAT BINARY)
+'''
+
+set_logged_query = '''
+ALTER TABLE {schema}.{table} SET LOGGED;
+'''
+
+analyze_query = '''
+ANALYZE {schema}.{table};
+'''
+
+create_watermark_table = '''
+CREATE TABLE IF NOT EXISTS "{schema}"."transfer_watermark" (
+    from_table text NOT NULL,
+    to_table text NOT NULL,
+    watermark_column text NOT NULL,
+    watermark text,
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (from_table, to_table)
+);
+'''
+
+get_watermark = '''
+SELECT watermark
+FROM "{schema}"."transfer_watermark"
+WHERE from_table = %(from_table)s AND to_table = %(to_table)s;
+'''
+
+set_watermark = '''
+INSERT INTO "{schema}"."transfer_watermark" (from_table, to_table, watermark_column, watermark)
+SELECT %(from_table)s, %(to_table)s, %(watermark_column)s,
+       GREATEST(max("{watermark_column}"), %(watermark)s::{watermark_type})::text
+FROM {stage_table}
+ON CONFLICT (from_table, to_table) DO UPDATE
+SET watermark_column = excluded.watermark_column,
+    watermark = excluded.watermark,
+    updated_at = now()
+RETURNING watermark;
+'''
+
+create_stage_table = '''
+CREATE TEMP TABLE {stage_table} (LIKE {schema}.{table} INCLUDING DEFAULTS) ON COMMIT DROP;
+'''
+
+merge_upsert_query = '''
+INSERT INTO {schema}.{table}
+SELECT * FROM {stage_table}
+ON CONFLICT ({key_columns}) DO {conflict_action};
+'''
+
+merge_delete_query = '''
+DELETE FROM {schema}.{table}
+WHERE %(watermark)s::{watermark_type} IS NULL
+   OR "{watermark_column}" > %(watermark)s::{watermark_type}{overlap};
+'''
+
+merge_insert_query = '''
+INSERT INTO {schema}.{table}
+SELECT * FROM {stage_table};
+'''
+
+delete_range_query = '''
+DELETE FROM {schema}.{table}
+WHERE (%(lower_value)s::{key_type} IS NULL OR "{key_column}" >= %(lower_value)s::{key_type})
+  AND (%(upper_value)s::{key_type} IS NULL OR "{key_column}" < %(upper_value)s::{key_type});
+'''
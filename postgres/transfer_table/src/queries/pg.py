@@ -8,7 +8,7 @@ FROM
 
 get_data_query = '''
 SELECT 
-    *
+    {columns}
 FROM 
     {schema}.{table}
 '''
@@ -24,5 +24,143 @@ get_table_owner = '''
 '''
 
 limit_depth = """
-WHERE "{depth_column}" > current_date - '{depth_months} months' :: INTERVAL
+"{depth_column}" > current_date - '{depth_months} months' :: INTERVAL
+"""
+
+get_columns_definition = """
+SELECT a.attname, format('%I %s', a.attname, format_type(a.atttypid, a.atttypmod))
+FROM pg_attribute a
+WHERE a.attrelid = '"{schema}"."{table}"'::regclass
+  AND a.attnum > 0
+  AND NOT a.attisdropped
+ORDER BY a.attnum
+"""
+
+get_primary_key = """
+SELECT a.attname
+FROM pg_index i
+JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY (i.indkey)
+WHERE i.indrelid = '"{schema}"."{table}"'::regclass
+  AND i.indisprimary
+"""
+
+get_column_type = """
+SELECT format_type(a.atttypid, a.atttypmod)
+FROM pg_attribute a
+WHERE a.attrelid = '"{schema}"."{table}"'::regclass
+  AND a.attname = '{column}'
+"""
+
+get_chunk_upper_bound = """
+SELECT max("{key_column}")::text
+FROM (
+    SELECT "{key_column}"
+    FROM ({selection_query}) t
+    WHERE "{key_column}" IS NOT NULL
+      AND (%(last_value)s::{key_type} IS NULL OR "{key_column}" > %(last_value)s::{key_type})
+    ORDER BY "{key_column}"
+    LIMIT %(chunk_size)s
+) s
+"""
+
+copy_chunk_to = """
+COPY (
+    SELECT *
+    FROM ({selection_query}) t
+    WHERE "{key_column}" <= %(upper_value)s::{key_type}
+      AND (%(last_value)s::{key_type} IS NULL OR "{key_column}" > %(last_value)s::{key_type})
+) TO STDOUT
+"""
+
+copy_binary_to = """
+COPY ({selection_query}) TO STDOUT (FORMAT BINARY)
+"""
+
+get_foreign_keys = """
+SELECT DISTINCT
+    cn.nspname || '.' || cc.relname AS child_table,
+    pn.nspname || '.' || pc.relname AS parent_table
+FROM pg_constraint c
+JOIN pg_class cc ON cc.oid = c.conrelid
+JOIN pg_namespace cn ON cn.oid = cc.relnamespace
+JOIN pg_class pc ON pc.oid = c.confrelid
+JOIN pg_namespace pn ON pn.oid = pc.relnamespace
+WHERE c.contype = 'f'
+  AND c.conrelid <> c.confrelid
+"""
+
+count_rows = """
+SELECT count(*)
+FROM {schema}.{table}
+"""
+
+get_columns = """
+SELECT a.attname
+FROM pg_attribute a
+WHERE a.attrelid = '"{schema}"."{table}"'::regclass
+  AND a.attnum > 0
+  AND NOT a.attisdropped
+ORDER BY a.attnum
+"""
+
+copy_increment_to = """
+COPY (
+    SELECT *
+    FROM ({selection_query}) t
+    WHERE %(watermark)s::{watermark_type} IS NULL
+       OR "{watermark_column}" > %(watermark)s::{watermark_type}{overlap}
+) TO STDOUT
+"""
+
+get_range_bounds = """
+SELECT (
+    percentile_disc(ARRAY(SELECT generate_series(1, {chunks} - 1)::float8 / {chunks}))
+    WITHIN GROUP (ORDER BY "{key_column}")
+)::text[]
+FROM ({selection_query}) t
+"""
+
+get_range_checksum = """
+SELECT
+    count(*),
+    coalesce(sum(('x' || substr(md5(transfer_row::text), 1, 15))::bit(60)::bigint), 0)::text
+FROM ({selection_query}) transfer_row
+WHERE (%(lower_value)s::{key_type} IS NULL OR "{key_column}" >= %(lower_value)s::{key_type})
+  AND (%(upper_value)s::{key_type} IS NULL OR "{key_column}" < %(upper_value)s::{key_type})
+"""
+
+copy_range_to = """
+COPY (
+    SELECT *
+    FROM ({selection_query}) t
+    WHERE (%(lower_value)s::{key_type} IS NULL OR "{key_column}" >= %(lower_value)s::{key_type})
+      AND (%(upper_value)s::{key_type} IS NULL OR "{key_column}" < %(upper_value)s::{key_type})
+) TO STDOUT
+"""
+
+get_column_dependents = """
+SELECT 'constraint', c.conname
+FROM pg_constraint c
+JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+WHERE c.conrelid = '"{schema}"."{table}"'::regclass
+  AND a.attname = ANY (%(columns)s)
+UNION
+SELECT 'index', ic.relname
+FROM pg_index i
+JOIN pg_class ic ON ic.oid = i.indexrelid
+JOIN pg_attribute a ON a.attrelid = i.indrelid
+ AND (a.attnum = ANY (i.indkey) OR a.attnum IN (
+     SELECT d.refobjsubid
+     FROM pg_depend d
+     WHERE d.classid = 'pg_class'::regclass AND d.objid = i.indexrelid AND d.refobjid = i.indrelid
+ ))
+WHERE i.indrelid = '"{schema}"."{table}"'::regclass
+  AND a.attname = ANY (%(columns)s)
+UNION
+SELECT 'trigger', t.tgname
+FROM pg_trigger t
+JOIN pg_attribute a ON a.attrelid = t.tgrelid AND a.attnum = ANY (t.tgattr)
+WHERE t.tgrelid = '"{schema}"."{table}"'::regclass
+  AND NOT t.tgisinternal
+  AND a.attname = ANY (%(columns)s)
 """
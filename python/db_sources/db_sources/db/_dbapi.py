@@ -1,11 +1,14 @@
 from abc import ABC
 from abc import abstractmethod
 from typing import Any
+from typing import Iterator
 from typing import Literal
 from typing import Optional
 
 from pandas import DataFrame
 
+from ._util import mask_secret_params
+from ._util import mask_secret_query
 from ._util import substitute_params
 
 
@@ -64,11 +67,12 @@ class DBAPI(ABC):
 
         print("----")
 
-        raw_query = " ".join(query.split())
+        raw_query = mask_secret_query(" ".join(query.split()))
         print(f"| {'raw_query':>12} : {raw_query}")
 
         if with_params:
             if isinstance(params, dict):
+                params = mask_secret_params(params)
                 query_ = substitute_params(query=raw_query, params=params)
                 print(f"| {'query':>12} : {query_}")
 
@@ -163,6 +167,31 @@ class DBAPI(ABC):
         """
         ...
 
+    @abstractmethod
+    def iter_df(
+        self,
+        query: str,
+        params: Optional[dict | tuple | list] = None,
+        chunksize: int = 100_000,
+        convert_bytes: bool | Literal["uuid", "str"] = False,
+        provide_query: bool = False,
+        provide_time: bool = False,
+    ) -> Iterator[DataFrame]:
+        """
+        Потоковое выполнение SQL-запроса к БД и возвращение результата частями в виде DataFrame
+
+        :param query: SQL-запрос
+        :param params: Параметры запроса
+        :param chunksize: Количество строк в одном DataFrame
+        :param convert_bytes: Конвертация bytes значений в uuid.
+            При True или "uuid" - возвращает тип UUID, при str - возвращает строку
+        :param provide_query: Вывод SQL-запроса
+        :param provide_time: Вывод времени выполнения SQL-запроса
+
+        :return генератор DataFrame
+        """
+        ...
+
     @abstractmethod
     def insert(
         self,
@@ -1,12 +1,38 @@
+import re
 from binascii import hexlify
 from datetime import date
 from datetime import datetime
 from datetime import time
 from enum import Enum
-from typing import Any, Literal
+from typing import Any, Iterator, Literal, Optional
 from uuid import UUID
 
 from pandas import DataFrame
+from pandas import Series
+from pandas.api import types as pd_types
+
+
+CLICK_DTYPE_MAPPING = {
+    "int": "Int32",
+    "float": "Float64",
+    "Decimal": "Decimal(15, 2)",
+    "str": "String",
+    "UUID": "UUID",
+    "date": "Date",
+    "Timestamp": "DateTime",
+    "bool": "Bool",
+}
+
+SERVER_PARAM_PATTERN = re.compile(r"\{(\w+):[^{}]+\}")
+
+# Параметры, значения которых не выводятся вместе с запросом (пароли, ключи доступа)
+SECRET_PARAM_PATTERN = re.compile(r"password|secret|token", re.IGNORECASE)
+SECRET_MASK = "******"
+# Пароль в строке подключения внутри запроса (dblink): password=..., password='...'
+SECRET_CONNINFO_PATTERN = re.compile(
+    r"(password\s*=\s*)(''(?:[^']|'''')*''|'(?:[^'\\]|\\.)*'|[^\s',)]+)",
+    re.IGNORECASE,
+)
 
 
 def _refactor_param(param):
@@ -44,9 +70,57 @@ def substitute_params(
 
     params_ = {key: _refactor_param(value) for key, value in params.items()}
 
+    # Серверные параметры ClickHouse вида {name:Type}
+    if SERVER_PARAM_PATTERN.search(query):
+        return SERVER_PARAM_PATTERN.sub(
+            lambda match: str(params_.get(match.group(1), match.group(0))),
+            query,
+        )
+
     return query % params_
 
 
+def mask_secret_params(params: dict) -> dict:
+    """
+    Функция замены значений секретных параметров (пароли, ключи доступа) для вывода запроса
+
+    :param params: Параметры запроса
+    :return: копия параметров со скрытыми значениями секретов
+    """
+
+    return {
+        key: SECRET_MASK if SECRET_PARAM_PATTERN.search(str(key)) and value is not None else value
+        for key, value in params.items()
+    }
+
+
+def mask_secret_query(query: str) -> str:
+    """
+    Функция скрытия паролей в строках подключения внутри запроса для вывода запроса
+
+    :param query: SQL-запрос
+    :return: запрос со скрытыми паролями
+    """
+
+    return SECRET_CONNINFO_PATTERN.sub(lambda match: match.group(1) + SECRET_MASK, query)
+
+
+def chunked(values: list, chunk_size: int) -> Iterator[list]:
+    """
+    Функция разбиения списка на части
+
+    :param values: Список значений
+    :param chunk_size: Размер части
+    :return: генератор частей списка
+    """
+
+    if chunk_size <= 0:
+        raise ValueError("Параметр chunk_size должен быть больше 0!")
+
+    for i in range(0, len(values), chunk_size):
+        yield values[i:i + chunk_size]
+
+
 def click_gen_struct(df: DataFrame) -> list[tuple[Any, str]]:
     """
     Функция для генерирования структуры таблицы из DataFrame
@@ -57,26 +131,15 @@ def click_gen_struct(df: DataFrame) -> list[tuple[Any, str]]:
 
     structure = []
 
-    dtype_mapping = {
-        "int": "Int32",
-        "float": "Float64",
-        "Decimal": "Decimal(15, 2)",
-        "str": "String",
-        "UUID": "UUID",
-        "date": "Date",
-        "Timestamp": "DateTime",
-        "bool": "Bool",
-    }
-
     for value, column in zip(
         df.iloc[0].to_numpy(na_value=None, dtype=object).tolist(),
         df.columns,
     ):
         col_type = "String"
 
-        for dtype in dtype_mapping:
+        for dtype in CLICK_DTYPE_MAPPING:
             if dtype in str(type(value)):
-                col_type = dtype_mapping[dtype]
+                col_type = CLICK_DTYPE_MAPPING[dtype]
                 break
 
         structure.append((column, col_type))
@@ -95,8 +158,10 @@ def click_df_to_table(df: DataFrame, table_name: str = None) -> dict:
 
     table_structure: list[tuple[Any, str]] = click_gen_struct(df)
 
-    # Для приведения столбцов object к string
-    df.loc[:, (df.dtypes == object)] = df.loc[:, (df.dtypes == object)].map(str)
+    # Для приведения столбцов object к string (без изменения исходного DataFrame)
+    object_columns = df.columns[df.dtypes == object]
+    df = df.copy()
+    df[object_columns] = df[object_columns].map(str)
 
     table = {
         "name": table_name,
@@ -106,6 +171,90 @@ def click_df_to_table(df: DataFrame, table_name: str = None) -> dict:
     return table
 
 
+def click_infer_struct(df: DataFrame) -> list[tuple[Any, str]]:
+    """
+    Функция для генерирования структуры таблицы из типов столбцов DataFrame.
+    Для столбцов object тип определяется по первому непустому значению
+
+    :param df: DataFrame
+    :return: структура таблицы
+    """
+
+    structure = []
+
+    for column, dtype in df.dtypes.items():
+        not_null = df[column].notna().to_numpy()
+
+        if pd_types.is_bool_dtype(dtype):
+            col_type = "Bool"
+        elif pd_types.is_integer_dtype(dtype):
+            name = dtype.name.lower()
+            col_type = f"UInt{name[4:]}" if name.startswith("uint") else f"Int{name[3:]}"
+        elif pd_types.is_float_dtype(dtype):
+            col_type = "Float32" if dtype.name.lower() == "float32" else "Float64"
+        elif pd_types.is_datetime64_any_dtype(dtype):
+            col_type = "DateTime"
+        else:
+            value = df[column].iat[not_null.argmax()] if not_null.any() else None
+            col_type = "String"
+
+            for py_type in CLICK_DTYPE_MAPPING:
+                if py_type in str(type(value)):
+                    col_type = CLICK_DTYPE_MAPPING[py_type]
+                    break
+
+        if not pd_types.is_float_dtype(dtype) and not not_null.all():
+            col_type = f"Nullable({col_type})"
+
+        structure.append((column, col_type))
+
+    return structure
+
+
+def _click_column_values(series: Series) -> list:
+    """
+    Функция получения значений столбца без приведения типов. Пропуски заменяются на None
+
+    :param series: столбец DataFrame
+    :return: список значений
+    """
+
+    if pd_types.is_float_dtype(series.dtype) or not series.hasnans:
+        return series.tolist()
+
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def click_df_to_blocks(
+    df: DataFrame,
+    table_name: str = None,
+    structure: Optional[list[tuple[Any, str]]] = None,
+    block_size: int = 100_000,
+) -> Iterator[dict]:
+    """
+    Функция для потоковой передачи DataFrame во внешнюю таблицу ClickHouse блоками.
+    Значения извлекаются по столбцам с сохранением исходных типов, исходный DataFrame не изменяется
+
+    :param df: DataFrame
+    :param table_name: имя таблицы в ClickHouse
+    :param structure: структура таблицы. Если не указана - определяется по типам столбцов
+    :param block_size: количество строк в одном блоке
+    :return: генератор словарей вида: {'name': ..., 'structure': ..., 'data': ...}
+    """
+
+    structure = structure or click_infer_struct(df)
+    columns = [column for column, _ in structure]
+
+    if df.empty:
+        yield {"name": table_name, "structure": structure, "data": []}
+        return
+
+    for start in range(0, len(df), block_size):
+        part = df.iloc[start:start + block_size]
+        values = [_click_column_values(part[column]) for column in columns]
+        yield {"name": table_name, "structure": structure, "data": list(zip(*values))}
+
+
 def _convert_bytes(
     rows: list = None,
     rows_type: Literal["tuple", "dict", "namedtuple"] = "tuple",
@@ -1,10 +1,20 @@
+import copy
+import os
 import time
 import warnings
+import zlib
+from collections import defaultdict
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from typing import Any
+from typing import Callable
+from typing import Iterator
 from typing import Literal
 from typing import Optional
+from typing import TYPE_CHECKING
+from uuid import uuid4
 
 from clickhouse_driver import Client
 from clickhouse_driver.dbapi.connection import Connection
@@ -12,7 +22,42 @@ from pandas import DataFrame
 
 from db_sources.exceptions import EmptyDataError, PartitionsNotFoundError
 from ._dbapi import DBAPI
-from ._util import click_df_to_table, _convert_bytes
+from .postgresql import PostgreSQL
+from ._util import chunked, click_df_to_blocks, click_df_to_table, _convert_bytes
+
+if TYPE_CHECKING:
+    from db_sources.storage import S3
+
+# Форматы табличной функции s3() по расширению файла
+S3_FORMATS = {
+    ".parquet": "Parquet",
+    ".csv": "CSVWithNames",
+    ".tsv": "TSVWithNames",
+    ".json": "JSONEachRow",
+    ".jsonl": "JSONEachRow",
+    ".ndjson": "JSONEachRow",
+    ".arrow": "Arrow",
+    ".feather": "Arrow",
+    ".orc": "ORC",
+}
+
+# Профили сжатия и размеров блоков нативного протокола.
+# compression / compress_block_size - параметры клиента,
+# max_block_size / insert_block_size - размеры блоков чтения / записи
+PROFILES = {
+    "bulk_export": {
+        "compression": "zstd",
+        "compress_block_size": 4 * 1024 * 1024,
+        "max_block_size": 1_048_576,
+        "insert_block_size": 1_048_576,
+    },
+    "interactive": {
+        "compression": "lz4",
+        "compress_block_size": 64 * 1024,
+        "max_block_size": 65_536,
+        "insert_block_size": 65_536,
+    },
+}
 
 
 class ClickHouse(DBAPI):
@@ -30,6 +75,12 @@ class ClickHouse(DBAPI):
         settings: Optional[dict] = None,
         sync: bool = False,
         wait_after_insert: int = None,
+        profile: Optional[Literal["bulk_export", "interactive"]] = None,
+        compression: Optional[bool | Literal["lz4", "lz4hc", "zstd"]] = None,
+        compress_block_size: Optional[int] = None,
+        max_block_size: Optional[int] = None,
+        insert_block_size: Optional[int] = None,
+        server_side_params: bool = False,
     ) -> None:
         """
         Класс для работы с БД Clickhouse
@@ -46,6 +97,15 @@ class ClickHouse(DBAPI):
         :param settings: Словарь с параметрами (https://clickhouse.com/docs/en/operations/settings/settings)
         :param sync: Синхронное ожидание выполнения запросов на всех репликах
         :param wait_after_insert: Ожидание после выполнения insert/insert_df (сек)
+        :param profile: Профиль сжатия и размеров блоков: "bulk_export" или "interactive".
+            Явно указанные параметры имеют приоритет над профилем
+        :param compression: Сжатие данных при передаче: True (lz4), "lz4", "lz4hc", "zstd".
+            Требует установки clickhouse-driver[lz4] / clickhouse-driver[zstd]
+        :param compress_block_size: Размер блока сжатия (байт)
+        :param max_block_size: Размер блока при чтении данных (строк)
+        :param insert_block_size: Размер блока при вставке данных (строк)
+        :param server_side_params: Передача параметров запроса на сервер
+            (плейсхолдеры вида {name:Type}) вместо подстановки на стороне клиента
         """
         super().__init__(
             host,
@@ -61,6 +121,25 @@ class ClickHouse(DBAPI):
         self.send_receive_timeout = send_receive_timeout
         self.settings = settings
         self.wait_after_insert = wait_after_insert
+        self.server_side_params = server_side_params
+
+        if profile is not None and profile not in PROFILES:
+            raise ValueError(f"Неизвестный профиль: {profile}. Доступные профили: {list(PROFILES)}")
+
+        profile_options = PROFILES.get(profile, {})
+        self.compression = (
+            compression if compression is not None else profile_options.get("compression", False)
+        )
+        self.compress_block_size = compress_block_size or profile_options.get("compress_block_size")
+
+        block_settings = {
+            "max_block_size": max_block_size or profile_options.get("max_block_size"),
+            "insert_block_size": insert_block_size or profile_options.get("insert_block_size"),
+        }
+        block_settings = {key: value for key, value in block_settings.items() if value}
+
+        if block_settings:
+            self.settings = {**block_settings, **(self.settings or dict())}
 
         if sync:
             self.settings = self.settings or dict()
@@ -68,13 +147,28 @@ class ClickHouse(DBAPI):
             self.settings["mutations_sync"] = 2
             self.settings["wait_for_async_insert"] = 1
 
-    def get_client(self) -> Client:
+    def get_client(self, server_side_params: Optional[bool] = None) -> Client:
         """
         Метод для получения клиента для подключения к БД ClickHouse
 
+        :param server_side_params: Передача параметров запроса на сервер.
+            Если не указан - используется значение, заданное при инициализации класса
         :return: клиент для подключения к БД ClickHouse
         """
 
+        if server_side_params is None:
+            server_side_params = self.server_side_params
+
+        settings = self.settings
+
+        if server_side_params:
+            settings = {**(settings or dict()), "server_side_params": True}
+
+        kwargs = dict()
+
+        if self.compress_block_size:
+            kwargs["compress_block_size"] = self.compress_block_size
+
         return Client(
             host=self.host,
             port=self.port,
@@ -83,7 +177,68 @@ class ClickHouse(DBAPI):
             password=self.password,
             connect_timeout=self.connect_timeout,
             send_receive_timeout=self.send_receive_timeout,
-            settings=self.settings,
+            settings=settings,
+            compression=self.compression,
+            **kwargs,
+        )
+
+    @staticmethod
+    def _query_cache_settings(
+        settings: Optional[dict],
+        use_query_cache: bool = False,
+        query_cache_ttl: Optional[int] = None,
+    ) -> Optional[dict]:
+        """
+        Добавление параметров кэша запросов к параметрам запроса
+
+        :param settings: Словарь с параметрами
+        :param use_query_cache: Использование кэша запросов на сервере
+        :param query_cache_ttl: Время жизни результата запроса в кэше (сек)
+        :return: словарь с параметрами
+        """
+
+        if not use_query_cache:
+            return settings
+
+        settings = {**(settings or dict()), "use_query_cache": 1}
+
+        if query_cache_ttl is not None:
+            settings["query_cache_ttl"] = query_cache_ttl
+
+        return settings
+
+    @staticmethod
+    def _prepare_external_tables(
+        external_tables: Optional[list[tuple] | list[dict]],
+        columnar: bool = False,
+        block_size: int = 100_000,
+    ) -> Optional[list[dict] | Iterator[dict]]:
+        """
+        Преобразование DataFrame во внешние таблицы ClickHouse
+
+        :param external_tables: Внешние таблицы
+        :param columnar: Потоковая передача блоками с сохранением исходных типов столбцов
+        :param block_size: Количество строк в одном блоке
+        :return: список внешних таблиц в формате clickhouse_driver
+        """
+
+        if not external_tables or not isinstance(external_tables[0][0], DataFrame):
+            return external_tables
+
+        if not columnar:
+            return [click_df_to_table(table[0], table[1]) for table in external_tables]
+
+        # Блоки формируются лениво во время отправки, несколько блоков с одинаковым
+        # именем дописываются сервером в одну внешнюю таблицу
+        return (
+            block
+            for df, name, *structure in external_tables
+            for block in click_df_to_blocks(
+                df=df,
+                table_name=name,
+                structure=structure[0] if structure else None,
+                block_size=block_size,
+            )
         )
 
     def get_connection(self) -> Connection:
@@ -104,6 +259,9 @@ class ClickHouse(DBAPI):
         external_tables: Optional[list[tuple[DataFrame, str]] | list[dict]] = None,
         settings: Optional[dict] = None,
         query_id: Optional[str] = None,
+        columnar_external_tables: bool = False,
+        external_block_size: int = 100_000,
+        server_side_params: Optional[bool] = None,
         **kwargs,
     ) -> None:
         """
@@ -113,9 +271,15 @@ class ClickHouse(DBAPI):
         :param params: Параметры запроса
         :param provide_query: Вывод SQL-запроса
         :param provide_time: Вывод времени выполнения SQL-запроса
-        :param external_tables: Внешние таблицы
+        :param external_tables: Внешние таблицы. Для DataFrame поддерживается формат:
+            (df, name) или (df, name, structure)
         :param settings: Словарь с параметрами
         :param query_id: Идентификатор SQL-запроса
+        :param columnar_external_tables: Потоковая передача DataFrame во внешние таблицы блоками
+            с сохранением исходных типов столбцов
+        :param external_block_size: Количество строк в одном блоке внешней таблицы
+        :param server_side_params: Передача параметров запроса на сервер (плейсхолдеры вида {name:Type}).
+            Если не указан - используется значение, заданное при инициализации класса
         """
 
         self._provide_query_info(
@@ -124,13 +288,13 @@ class ClickHouse(DBAPI):
             provide_query=provide_query,
             settings=settings,
         )
-        if external_tables:
-            if isinstance(external_tables[0][0], DataFrame):
-                external_tables = [
-                    click_df_to_table(table[0], table[1]) for table in external_tables
-                ]
+        external_tables = self._prepare_external_tables(
+            external_tables=external_tables,
+            columnar=columnar_external_tables,
+            block_size=external_block_size,
+        )
 
-        with self.get_client() as client:
+        with self.get_client(server_side_params=server_side_params) as client:
             start_time = datetime.now()
             client.execute(
                 query=query,
@@ -156,7 +320,12 @@ class ClickHouse(DBAPI):
         external_tables: Optional[list[tuple[DataFrame, str]] | list[dict]] = None,
         settings: Optional[dict] = None,
         query_id: Optional[str] = None,
+        columnar_external_tables: bool = False,
+        external_block_size: int = 100_000,
         check_empty: bool = False,
+        server_side_params: Optional[bool] = None,
+        use_query_cache: bool = False,
+        query_cache_ttl: Optional[int] = None,
         **kwargs,
     ) -> Optional[list[tuple] | list[dict] | tuple[list[tuple], Any]]:
         """
@@ -170,12 +339,25 @@ class ClickHouse(DBAPI):
             При True или "uuid" - возвращает тип UUID, при str - возвращает строку
         :param provide_query: Вывод SQL-запроса
         :param provide_time: Вывод времени выполнения SQL-запроса
-        :param external_tables: Внешние таблицы
+        :param external_tables: Внешние таблицы. Для DataFrame поддерживается формат:
+            (df, name) или (df, name, structure)
         :param settings: Словарь с параметрами
         :param query_id: Идентификатор SQL-запроса
+        :param columnar_external_tables: Потоковая передача DataFrame во внешние таблицы блоками
+            с сохранением исходных типов столбцов
+        :param external_block_size: Количество строк в одном блоке внешней таблицы
         :param check_empty: Вызов ошибки при отсутствии данных в результате запроса
+        :param server_side_params: Передача параметров запроса на сервер (плейсхолдеры вида {name:Type}).
+            Если не указан - используется значение, заданное при инициализации класса
+        :param use_query_cache: Использование кэша запросов на сервере (use_query_cache)
+        :param query_cache_ttl: Время жизни результата запроса в кэше (сек)
         """
 
+        settings = self._query_cache_settings(
+            settings=settings,
+            use_query_cache=use_query_cache,
+            query_cache_ttl=query_cache_ttl,
+        )
         self._provide_query_info(
             query=query,
             params=params,
@@ -183,13 +365,13 @@ class ClickHouse(DBAPI):
             settings=settings,
         )
 
-        if external_tables:
-            if isinstance(external_tables[0][0], DataFrame):
-                external_tables = [
-                    click_df_to_table(table[0], table[1]) for table in external_tables
-                ]
+        external_tables = self._prepare_external_tables(
+            external_tables=external_tables,
+            columnar=columnar_external_tables,
+            block_size=external_block_size,
+        )
 
-        with self.get_client() as client:
+        with self.get_client(server_side_params=server_side_params) as client:
             start_time = datetime.now()
             rows, columns = client.execute(
                 query=query,
@@ -237,6 +419,11 @@ class ClickHouse(DBAPI):
         provide_time: bool = False,
         external_tables: Optional[list[tuple[DataFrame, str]] | list[dict]] = None,
         check_empty: bool = False,
+        columnar_external_tables: bool = False,
+        external_block_size: int = 100_000,
+        server_side_params: Optional[bool] = None,
+        use_query_cache: bool = False,
+        query_cache_ttl: Optional[int] = None,
         **kwargs,
     ) -> DataFrame:
         """
@@ -248,8 +435,16 @@ class ClickHouse(DBAPI):
             При True или "uuid" - возвращает тип UUID, при str - возвращает строку
         :param provide_query: Вывод SQL-запроса
         :param provide_time: Вывод времени выполнения SQL-запроса
-        :param external_tables: Внешние таблицы
+        :param external_tables: Внешние таблицы. Для DataFrame поддерживается формат:
+            (df, name) или (df, name, structure)
         :param check_empty: Вызов ошибки при отсутствии данных в результате запроса
+        :param columnar_external_tables: Потоковая передача DataFrame во внешние таблицы блоками
+            с сохранением исходных типов столбцов
+        :param external_block_size: Количество строк в одном блоке внешней таблицы
+        :param server_side_params: Передача параметров запроса на сервер (плейсхолдеры вида {name:Type}).
+            Если не указан - используется значение, заданное при инициализации класса
+        :param use_query_cache: Использование кэша запросов на сервере (use_query_cache)
+        :param query_cache_ttl: Время жизни результата запроса в кэше (сек)
 
         :return DataFrame
         """
@@ -263,11 +458,70 @@ class ClickHouse(DBAPI):
             provide_time=provide_time,
             external_tables=external_tables,
             check_empty=check_empty,
+            columnar_external_tables=columnar_external_tables,
+            external_block_size=external_block_size,
+            server_side_params=server_side_params,
+            use_query_cache=use_query_cache,
+            query_cache_ttl=query_cache_ttl,
             **kwargs,
         )
         df = DataFrame(rows, columns=columns)
         return df
 
+    def iter_df(
+        self,
+        query: str,
+        params: Optional[dict | tuple | list] = None,
+        chunksize: int = 100_000,
+        convert_bytes: bool | Literal["uuid", "str"] = False,
+        provide_query: bool = False,
+        provide_time: bool = False,
+        settings: Optional[dict] = None,
+        server_side_params: Optional[bool] = None,
+    ) -> Iterator[DataFrame]:
+        """
+        Потоковое выполнение SQL-запроса к БД и возвращение результата частями в виде DataFrame.
+        Блоки читаются по мере обработки (execute_iter), в памяти находится только текущая часть
+
+        :param query: SQL-запрос
+        :param params: Параметры запроса
+        :param chunksize: Количество строк в одном DataFrame
+        :param convert_bytes: Конвертация bytes значений в uuid.
+            При True или "uuid" - возвращает тип UUID, при str - возвращает строку
+        :param provide_query: Вывод SQL-запроса
+        :param provide_time: Вывод времени выполнения SQL-запроса
+        :param settings: Словарь с параметрами
+        :param server_side_params: Передача параметров запроса на сервер (плейсхолдеры вида {name:Type}).
+            Если не указан - используется значение, заданное при инициализации класса
+
+        :return генератор DataFrame
+        """
+
+        self._provide_query_info(
+            query=query,
+            params=params,
+            provide_query=provide_query,
+            settings=settings,
+        )
+
+        with self.get_client(server_side_params=server_side_params) as client:
+            start_time = datetime.now()
+            rows_iter = client.execute_iter(
+                query=query,
+                params=params,
+                with_column_types=True,
+                settings={"max_block_size": chunksize, **(settings or {})},
+            )
+            columns = [column[0] for column in next(rows_iter)]
+
+            while rows := list(islice(rows_iter, chunksize)):
+                if convert_bytes:
+                    rows = _convert_bytes(rows, as_uuid=False if convert_bytes == "str" else True)
+                yield DataFrame(rows, columns=columns)
+
+        if provide_time:
+            print(f"| {'elapsed_time':>12} : {datetime.now() - start_time}")
+
     def insert(
         self,
         table: str,
@@ -359,12 +613,345 @@ class ClickHouse(DBAPI):
             wait_after_insert=wait_after_insert,
         )
 
+    def get_cluster_shards(self, cluster: str) -> list[dict]:
+        """
+        Получение топологии кластера: первая реплика каждого шарда и вес шарда
+
+        :param cluster: Наименование кластера
+        :return: список словарей вида: {'shard_num': ..., 'shard_weight': ..., 'host': ..., 'port': ...}
+        """
+
+        return self.execute_to_list(
+            "SELECT shard_num, any(shard_weight) AS shard_weight, "
+            "argMin(host_name, replica_num) AS host, argMin(port, replica_num) AS port "
+            "FROM system.clusters "
+            "WHERE cluster = %(cluster)s "
+            "GROUP BY shard_num "
+            "ORDER BY shard_num",
+            params={"cluster": cluster},
+            rows_type="dict",
+            check_empty=True,
+        )
+
+    @staticmethod
+    def _shard_slot(value: Any, slots_count: int) -> int:
+        """
+        Вычисление слота шарда по значению ключа шардирования.
+        Для целочисленных ключей совпадает с распределением Distributed при sharding_key = столбец,
+        для остальных типов используется crc32 от строкового представления значения
+
+        :param value: Значение ключа шардирования
+        :param slots_count: Суммарный вес шардов
+        :return: номер слота
+        """
+
+        if isinstance(value, int):
+            key = value & 0xFFFFFFFFFFFFFFFF
+        else:
+            key = zlib.crc32(str(value).encode())
+
+        return key % slots_count
+
+    def insert_sharded(
+        self,
+        table: str,
+        values: list[tuple] | list[list],
+        columns: list,
+        sharding_key: str,
+        cluster: str,
+        schema: Optional[str] = None,
+        max_workers: int = None,
+        wait_after_insert: int = None,
+    ) -> None:
+        """
+        Параллельная вставка данных напрямую в локальные таблицы шардов кластера.
+        Строки распределяются по шардам на стороне клиента по ключу шардирования с учётом весов шардов
+        (system.clusters), каждый шард загружается в отдельном потоке
+
+        :param table: Наименование локальной таблицы на шардах. Поддерживается формат: schema.table, table
+        :param values: Значения
+        :param columns: Наименования колонок
+        :param sharding_key: Наименование колонки - ключа шардирования
+        :param cluster: Наименование кластера
+        :param schema: Наименование схемы / БД
+        :param max_workers: Количество параллельных вставок. По умолчанию - количество шардов
+        :param wait_after_insert: Ожидание после выполнения запроса (сек)
+        """
+
+        if not values:
+            print("it's nothing to insert")
+            return
+
+        shards = self.get_cluster_shards(cluster)
+
+        # Слоты шардов в порядке shard_num, как в движке Distributed
+        slots = [
+            shard_index
+            for shard_index, shard in enumerate(shards)
+            for _ in range(shard["shard_weight"])
+        ]
+        key_index = list(columns).index(sharding_key)
+
+        shard_values = defaultdict(list)
+        for row in values:
+            shard_values[slots[self._shard_slot(row[key_index], len(slots))]].append(row)
+
+        def insert_shard(shard_index: int) -> None:
+            shard_db = copy.copy(self)
+            shard_db.host = shards[shard_index]["host"]
+            shard_db.port = shards[shard_index]["port"]
+            shard_db.insert(
+                table=table,
+                values=shard_values[shard_index],
+                columns=columns,
+                schema=schema,
+                wait_after_insert=0,
+            )
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(shards)) as executor:
+            for future in [executor.submit(insert_shard, index) for index in shard_values]:
+                future.result()
+
+        if wait_after_insert is None:
+            wait_after_insert = self.wait_after_insert
+
+        if wait_after_insert:
+            time.sleep(wait_after_insert)
+
+    def insert_df_sharded(
+        self,
+        df: DataFrame,
+        table: str,
+        sharding_key: str,
+        cluster: str,
+        schema: Optional[str] = None,
+        max_workers: int = None,
+        wait_after_insert: int = None,
+    ) -> None:
+        """
+        Параллельная вставка DataFrame напрямую в локальные таблицы шардов кластера
+
+        :param df: DataFrame
+        :param table: Наименование локальной таблицы на шардах. Поддерживается формат: schema.table, table
+        :param sharding_key: Наименование колонки - ключа шардирования
+        :param cluster: Наименование кластера
+        :param schema: Наименование схемы / БД
+        :param max_workers: Количество параллельных вставок. По умолчанию - количество шардов
+        :param wait_after_insert: Ожидание после выполнения запроса (сек)
+        """
+
+        self.insert_sharded(
+            table=table,
+            values=df.to_numpy(na_value=None, dtype=object).tolist(),
+            columns=df.columns.tolist(),
+            sharding_key=sharding_key,
+            cluster=cluster,
+            schema=schema,
+            max_workers=max_workers,
+            wait_after_insert=wait_after_insert,
+        )
+
+    def optimize_partitions(
+        self,
+        table: str,
+        partitions: list[str],
+        schema: Optional[str] = None,
+        cluster: str = None,
+    ) -> None:
+        """
+        Внеплановое слияние (OPTIMIZE ... FINAL) указанных партиций таблицы.
+        Не ожидает выполнения слияния на остальных репликах
+
+        :param table: Наименование таблицы. Поддерживается формат: schema.table, table
+        :param partitions: Список идентификаторов партиций (partition_id)
+        :param schema: Наименование схемы / БД
+        :param cluster: Наименование кластера, на котором необходимо выполнить операцию
+        """
+        schema_table = f"{schema}.{table}" if schema else table
+        cluster_query = f"ON CLUSTER {cluster}" if cluster else ""
+
+        for partition_id in partitions:
+            self.execute(
+                f"OPTIMIZE TABLE {schema_table} {cluster_query} PARTITION ID %(partition_id)s FINAL",
+                params={"partition_id": partition_id},
+                settings={"alter_sync": 0},
+            )
+
+    def upsert_df(
+        self,
+        df: DataFrame,
+        table: str,
+        version_column: str = "_version",
+        schema: Optional[str] = None,
+        create_table: bool = False,
+        order_by: list = None,
+        optimize: bool = False,
+        cluster: str = None,
+    ) -> list[str]:
+        """
+        Вставка DataFrame в таблицу ReplacingMergeTree(version_column) как upsert.
+        Каждой строке проставляется версия (время загрузки в наносекундах), поэтому при слиянии
+        остаются последние загруженные строки. Затронутые партиции вычисляются по вставленным строкам
+        через ключ партиционирования таблицы и возвращаются, чтобы слить их позже через optimize_partitions
+
+        :param df: DataFrame
+        :param table: Наименование таблицы. Поддерживается формат: schema.table, table
+        :param version_column: Наименование столбца версии (UInt64)
+        :param schema: Наименование схемы / БД
+        :param create_table: Создание таблицы ReplacingMergeTree при вставке
+        :param order_by: Список столбцов ключа (ключ сортировки). Используется при create_table=True
+        :param optimize: Слияние затронутых партиций (OPTIMIZE ... FINAL) сразу после загрузки.
+            Выполняется синхронно, поэтому по умолчанию выключено
+        :param cluster: Наименование кластера, на котором необходимо выполнить OPTIMIZE
+        :return: список идентификаторов затронутых партиций
+        """
+        schema_table = f"{schema}.{table}" if schema else table
+        df = df.assign(**{version_column: time.time_ns()})
+
+        if create_table:
+            if not order_by:
+                raise ValueError("Параметр order_by обязателен при create_table = True!")
+
+            self.execute(
+                self.generate_ddl(
+                    df=df,
+                    table=table,
+                    schema=schema,
+                    order_by=order_by,
+                    engine=f'ReplacingMergeTree("{version_column}")',
+                    column_types={version_column: "UInt64"},
+                )
+            )
+
+        self.insert_df(df=df, table=table, schema=schema)
+
+        # Партиции вычисляются по вставленным строкам через ключ партиционирования таблицы,
+        # а не по system.parts: туда попадают и результаты слияний, и чужие вставки
+        schema_name, table_name = schema_table.rsplit(".", 1) if "." in schema_table else (None, table)
+        table_filter = (
+            "database = %(schema)s AND table = %(table)s"
+            if schema_name
+            else "database = currentDatabase() AND table = %(table)s"
+        )
+        table_params = {"schema": schema_name, "table": table_name}
+
+        partition_key = self.execute_to_list(
+            f"SELECT partition_key FROM system.tables WHERE {table_filter}",
+            params=table_params,
+        )[0][0]
+
+        if not partition_key:
+            partitions = ["all"]
+        else:
+            structure = [
+                (name, column_type)
+                for name, column_type in self.execute_to_list(
+                    f"SELECT name, type FROM system.columns WHERE {table_filter} ORDER BY position",
+                    params=table_params,
+                )
+                if name in df.columns
+            ]
+            partitions = [
+                row[0]
+                for row in self.execute_to_list(
+                    f"SELECT DISTINCT partitionId({partition_key}) FROM _upsert_rows",
+                    external_tables=[(df[[name for name, _ in structure]], "_upsert_rows", structure)],
+                    columnar_external_tables=True,
+                )
+            ]
+
+        if optimize:
+            self.optimize_partitions(
+                table=table,
+                partitions=partitions,
+                schema=schema,
+                cluster=cluster,
+            )
+
+        return partitions
+
+    def read_latest_df(
+        self,
+        table: str,
+        schema: Optional[str] = None,
+        columns: Optional[list] = None,
+        where: Optional[str] = None,
+        params: Optional[dict] = None,
+        method: Literal["final", "argmax"] = "final",
+        version_column: str = "_version",
+        key_columns: Optional[list] = None,
+    ) -> DataFrame:
+        """
+        Чтение последних версий строк из таблицы ReplacingMergeTree без ожидания слияний
+
+        :param table: Наименование таблицы. Поддерживается формат: schema.table, table
+        :param schema: Наименование схемы / БД
+        :param columns: Список столбцов. По умолчанию - все столбцы
+        :param where: Условие отбора строк. Для method="argmax" должно использовать только ключевые столбцы,
+            иначе отбор выполняется до выбора последней версии
+        :param params: Параметры запроса
+        :param method: "final" - SELECT ... FINAL без слияния между партициями,
+            "argmax" - GROUP BY по ключу с argMax по столбцу версии
+        :param version_column: Наименование столбца версии. Используется при method="argmax"
+        :param key_columns: Список ключевых столбцов. Используется при method="argmax".
+            По умолчанию - столбцы, входящие в ключ сортировки таблицы
+        :return: DataFrame
+        """
+        schema_table = f"{schema}.{table}" if schema else table
+        where_query = f"WHERE {where}" if where else ""
+
+        if method == "final":
+            columns_query = ", ".join(f'"{column}"' for column in columns) if columns else "*"
+            return self.execute_to_df(
+                f"SELECT {columns_query} FROM {schema_table} FINAL {where_query}",
+                params=params,
+                settings={"do_not_merge_across_partitions_select_final": 1},
+            )
+
+        if not key_columns:
+            # Столбцы ключа берутся из каталога: выражение ключа может содержать функции
+            # от нескольких столбцов (например, cityHash64(a, b)) и не разбирается по запятым
+            key_columns = [
+                row[0]
+                for row in self.execute_to_list(
+                    "SELECT name FROM system.columns "
+                    "WHERE (database || '.' || table = %(schema_table)s "
+                    "OR (database = currentDatabase() AND table = %(schema_table)s)) "
+                    "AND is_in_sorting_key "
+                    "ORDER BY position",
+                    params={"schema_table": schema_table},
+                    check_empty=True,
+                )
+            ]
+
+        if not columns:
+            columns = [
+                row[0]
+                for row in self.execute_to_list(f"DESCRIBE TABLE {schema_table}")
+            ]
+
+        value_columns = [
+            f'argMax("{column}", "{version_column}") AS "{column}"'
+            for column in columns
+            if column not in key_columns
+        ]
+        key_query = ", ".join(f'"{column}"' for column in key_columns)
+        columns_query = ", ".join([key_query, *value_columns])
+
+        df = self.execute_to_df(
+            f"SELECT {columns_query} FROM {schema_table} {where_query} GROUP BY {key_query}",
+            params=params,
+        )
+        return df[[column for column in columns if column in df.columns]]
+
     def generate_ddl(
         self,
         df: DataFrame,
         table: str,
         schema: str = None,
         order_by: list = None,
+        engine: str = "MergeTree",
+        column_types: Optional[dict] = None,
     ) -> str:
         """
         Генерация DDL таблицы на основе DataFrame
@@ -373,6 +960,8 @@ class ClickHouse(DBAPI):
         :param table: Наименование таблицы. Поддерживается формат: schema.table, table
         :param schema: Наименование схемы / БД
         :param order_by: Список столбцов для ключа сортировки
+        :param engine: Движок таблицы
+        :param column_types: Словарь с явно заданными типами столбцов вида {column: type}
         """
 
         schema_table = f"{schema}.{table}" if schema else table
@@ -391,6 +980,7 @@ class ClickHouse(DBAPI):
             "bool": "Bool",
         }
 
+        column_types = column_types or dict()
         columns = []
 
         for value, column in zip(
@@ -404,13 +994,13 @@ class ClickHouse(DBAPI):
                     col_type = dtype_mapping[dtype]
                     break
 
-            columns.append(f'"{column}" {col_type}')
+            columns.append(f'"{column}" {column_types.get(column, col_type)}')
 
         columns_ddl = ",\n".join(columns)
         order_by_ddl = ", ".join([f'"{column}"' for column in order_by])
         ddl = (
             f"CREATE TABLE IF NOT EXISTS {schema_table} (\n{columns_ddl}\n)\n"
-            f"ENGINE = MergeTree\nORDER BY ({order_by_ddl})"
+            f"ENGINE = {engine}\nORDER BY ({order_by_ddl})"
         )
 
         return ddl
@@ -504,3 +1094,296 @@ class ClickHouse(DBAPI):
                 f"ALTER TABLE {target_schema_table} {cluster_query} "
                 f"ATTACH PARTITION {partition} FROM {source_schema_table}"
             )
+
+    def _reload(
+        self,
+        load: Callable[[str], None],
+        table: str,
+        schema: str = None,
+        cluster: str = None,
+    ) -> None:
+        """
+        Перезагрузка таблицы через теневую таблицу и EXCHANGE TABLES
+
+        :param load: Функция наполнения теневой таблицы. Принимает наименование теневой таблицы
+        :param table: Наименование таблицы. Поддерживается формат: schema.table, table
+        :param schema: Наименование схемы / БД
+        :param cluster: Наименование кластера, на котором необходимо выполнить операцию
+        """
+        schema_table = f"{schema}.{table}" if schema else table
+        # Уникальный суффикс: параллельные перезагрузки одной таблицы не должны делить теневую таблицу,
+        # при совпадении имени CREATE TABLE завершится ошибкой
+        shadow_table = f"{schema_table}__reload_{datetime.now():%Y%m%d%H%M%S}_{uuid4().hex[:8]}"
+        cluster_query = f"ON CLUSTER {cluster}" if cluster else ""
+
+        self.execute(f"CREATE TABLE {shadow_table} {cluster_query} AS {schema_table}")
+
+        try:
+            load(shadow_table)
+            self.exchange(
+                first_table=shadow_table,
+                second_table=schema_table,
+                cluster=cluster,
+            )
+        finally:
+            self.execute(f"DROP TABLE IF EXISTS {shadow_table} {cluster_query}")
+
+    def reload_df(
+        self,
+        df: DataFrame,
+        table: str,
+        schema: str = None,
+        cluster: str = None,
+        chunk_size: int = 100_000,
+        max_workers: int = 4,
+    ) -> None:
+        """
+        Атомарная перезагрузка таблицы данными из DataFrame.
+        Данные вставляются в теневую таблицу с тем же движком, после чего таблицы
+        меняются местами (EXCHANGE TABLES), а старые данные удаляются.
+        Читатели не видят частично загруженную таблицу
+
+        :param df: DataFrame
+        :param table: Наименование таблицы. Поддерживается формат: schema.table, table
+        :param schema: Наименование схемы / БД
+        :param cluster: Наименование кластера, на котором необходимо выполнить операцию
+        :param chunk_size: Количество строк в одной вставке
+        :param max_workers: Количество параллельных вставок
+        """
+        values = df.to_numpy(na_value=None, dtype=object).tolist()
+        columns = df.columns.tolist()
+
+        def load(shadow_table: str) -> None:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self.insert,
+                        table=shadow_table,
+                        values=chunk,
+                        columns=columns,
+                        wait_after_insert=0,
+                    )
+                    for chunk in chunked(values, chunk_size)
+                ]
+                for future in futures:
+                    future.result()
+
+        self._reload(load=load, table=table, schema=schema, cluster=cluster)
+
+    def reload_from_query(
+        self,
+        query: str,
+        table: str,
+        schema: str = None,
+        params: Optional[dict] = None,
+        cluster: str = None,
+        settings: Optional[dict] = None,
+    ) -> None:
+        """
+        Атомарная перезагрузка таблицы результатом SELECT-запроса.
+        Запрос выполняется на сервере (INSERT INTO ... SELECT) в теневую таблицу,
+        после чего таблицы меняются местами (EXCHANGE TABLES)
+
+        :param query: SELECT-запрос
+        :param table: Наименование таблицы. Поддерживается формат: schema.table, table
+        :param schema: Наименование схемы / БД
+        :param params: Параметры запроса
+        :param cluster: Наименование кластера, на котором необходимо выполнить операцию
+        :param settings: Словарь с параметрами
+        """
+
+        def load(shadow_table: str) -> None:
+            self.execute(
+                f"INSERT INTO {shadow_table} {query}",
+                params,
+                settings=settings,
+            )
+
+        self._reload(load=load, table=table, schema=schema, cluster=cluster)
+
+    def insert_from_postgresql(
+        self,
+        table: str,
+        source_table: str,
+        source: Optional[PostgreSQL] = None,
+        source_schema: str = "public",
+        schema: Optional[str] = None,
+        where: Optional[str] = None,
+        truncate: bool = False,
+        settings: Optional[dict] = None,
+        named_collection: Optional[str] = None,
+    ) -> None:
+        """
+        Перенос данных из PostgreSQL на стороне сервера ClickHouse (табличная функция postgresql()),
+        строки не передаются через Python
+
+        :param table: Наименование таблицы получателя. Поддерживается формат: schema.table, table
+        :param source_table: Наименование таблицы источника
+        :param source: Подключение к БД PostgreSQL источника. Пароль передается в параметрах запроса
+        :param source_schema: Наименование схемы таблицы источника
+        :param schema: Наименование схемы / БД таблицы получателя
+        :param where: Условие отбора строк источника
+        :param truncate: Очистить таблицу перед вставкой
+        :param settings: Словарь с параметрами
+        :param named_collection: Именованная коллекция ClickHouse с параметрами подключения к PostgreSQL.
+            Учетные данные хранятся на сервере и не передаются в запросе, используется вместо source
+        """
+        schema_table = f"{schema}.{table}" if schema else table
+        where_query = f"WHERE {where}" if where else ""
+
+        if named_collection:
+            function_query = f"postgresql({named_collection}, table = %(table)s, schema = %(schema)s)"
+            params = {"table": source_table, "schema": source_schema}
+        elif source:
+            function_query = (
+                "postgresql(%(address)s, %(database)s, %(table)s, %(user)s, %(password)s, %(schema)s)"
+            )
+            params = {
+                "address": f"{source.host}:{source.port}",
+                "database": source.database,
+                "table": source_table,
+                "user": source.user,
+                "password": source.password,
+                "schema": source_schema,
+            }
+        else:
+            raise ValueError("Необходимо указать source или named_collection!")
+
+        if truncate:
+            self.truncate(table=table, schema=schema)
+
+        self.execute(
+            f"INSERT INTO {schema_table} SELECT * FROM {function_query} {where_query}",
+            params=params,
+            settings=settings,
+        )
+
+    def insert_from_remote(
+        self,
+        table: str,
+        source: "ClickHouse",
+        source_table: str,
+        schema: Optional[str] = None,
+        where: Optional[str] = None,
+        truncate: bool = False,
+        settings: Optional[dict] = None,
+    ) -> None:
+        """
+        Перенос данных с другого сервера ClickHouse на стороне сервера (табличная функция remote()),
+        строки не передаются через Python
+
+        :param table: Наименование таблицы получателя. Поддерживается формат: schema.table, table
+        :param source: Подключение к серверу ClickHouse источника
+        :param source_table: Наименование таблицы источника. Поддерживается формат: schema.table, table
+        :param schema: Наименование схемы / БД таблицы получателя
+        :param where: Условие отбора строк источника
+        :param truncate: Очистить таблицу перед вставкой
+        :param settings: Словарь с параметрами
+        """
+        schema_table = f"{schema}.{table}" if schema else table
+        where_query = f"WHERE {where}" if where else ""
+
+        if "." not in source_table and source.database:
+            source_table = f"{source.database}.{source_table}"
+
+        if truncate:
+            self.truncate(table=table, schema=schema)
+
+        self.execute(
+            f"INSERT INTO {schema_table} "
+            f"SELECT * FROM remote(%(address)s, {source_table}, %(user)s, %(password)s) "
+            f"{where_query}",
+            params={
+                "address": f"{source.host}:{source.port}",
+                "user": source.user,
+                "password": source.password,
+            },
+            settings=settings,
+        )
+
+    def load_from_s3(
+        self,
+        table: str,
+        object_name: str,
+        source: Optional["S3"] = None,
+        bucket: Optional[str] = None,
+        schema: Optional[str] = None,
+        format: Optional[str] = None,
+        structure: Optional[str] = None,
+        columns: Optional[list] = None,
+        endpoint_url: Optional[str] = None,
+        truncate: bool = False,
+        max_threads: Optional[int] = None,
+        settings: Optional[dict] = None,
+        named_collection: Optional[str] = None,
+    ) -> None:
+        """
+        Загрузка файлов из S3 на стороне сервера ClickHouse (табличная функция s3()),
+        строки не передаются через Python. Файлы, подходящие под шаблон, читаются сервером параллельно,
+        сжатие (gz, zst, ...) определяется по расширению
+
+        :param table: Наименование таблицы получателя. Поддерживается формат: schema.table, table
+        :param object_name: Наименование объекта или glob-шаблон (*, ?, {a,b}, {1..10}).
+            Пример: exports/2024-*/part-*.parquet
+        :param source: Подключение к S3. Ключи доступа передаются в параметрах запроса
+        :param bucket: Наименование бакета. По умолчанию - бакет подключения source
+        :param schema: Наименование схемы / БД таблицы получателя
+        :param format: Формат файлов ClickHouse (Parquet, CSVWithNames, ...). По умолчанию определяется по расширению
+        :param structure: Структура файлов, например: "id UInt32, attr String". По умолчанию определяется сервером
+        :param columns: Колонки таблицы получателя (и файлов) для загрузки
+        :param endpoint_url: Адрес S3, доступный с сервера ClickHouse. По умолчанию - адрес подключения source
+        :param truncate: Очистить таблицу перед вставкой
+        :param max_threads: Количество потоков чтения на сервере
+        :param settings: Словарь с параметрами
+        :param named_collection: Именованная коллекция ClickHouse с адресом бакета (url) и ключами доступа.
+            Ключи хранятся на сервере и не передаются в запросе, object_name задается относительно url коллекции.
+            Используется вместо source
+        """
+        schema_table = f"{schema}.{table}" if schema else table
+        if not named_collection:
+            if not source:
+                raise ValueError("Необходимо указать source или named_collection!")
+            bucket = bucket or source.bucket
+            if not bucket:
+                raise ValueError('Bucket is not specified. Set the "bucket" parameter.')
+
+        if format is None:
+            name, extension = os.path.splitext(object_name)
+            if extension in (".gz", ".gzip", ".zst", ".zstd", ".bz2", ".xz", ".lz4"):
+                _, extension = os.path.splitext(name)
+            if extension not in S3_FORMATS:
+                raise ValueError(f"Не удалось определить формат файла: {object_name}. Укажите параметр format")
+            format = S3_FORMATS[extension]
+
+        if max_threads:
+            settings = {**(settings or {}), "max_threads": max_threads}
+
+        columns_query = f"({', '.join(columns)})" if columns else ""
+
+        if named_collection:
+            structure_query = ", structure = %(structure)s" if structure else ""
+            function_query = (
+                f"s3({named_collection}, filename = %(filename)s, format = %(format)s{structure_query})"
+            )
+            params = {"filename": object_name, "format": format, "structure": structure}
+        else:
+            structure_query = ", %(structure)s" if structure else ""
+            function_query = f"s3(%(url)s, %(access_key)s, %(secret_key)s, %(format)s{structure_query})"
+            params = {
+                "url": f"{(endpoint_url or source.endpoint_url).rstrip('/')}/{bucket}/{object_name}",
+                "access_key": source.access_key,
+                "secret_key": source.secret_key,
+                "format": format,
+                "structure": structure,
+            }
+
+        if truncate:
+            self.truncate(table=table, schema=schema)
+
+        self.execute(
+            f"INSERT INTO {schema_table} {columns_query} "
+            f"SELECT {', '.join(columns) if columns else '*'} "
+            f"FROM {function_query}",
+            params=params,
+            settings=settings,
+        )
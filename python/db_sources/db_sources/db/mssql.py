@@ -1,6 +1,7 @@
 from collections import namedtuple
 from datetime import datetime
 from typing import Any
+from typing import Iterator
 from typing import Literal
 from typing import Optional
 
@@ -50,19 +51,23 @@ class MSSQL(DBAPI):
 
         self.nolock = nolock
 
+    @staticmethod
+    def _decode_error(e: pymssql.Error) -> pymssql.Error:
+        if not isinstance(e.args[-1], str):
+            e.args = (
+                (e.args[-1][-1].decode(),)
+                if isinstance(e.args[-1], tuple)
+                else (e.args[-1].decode(),)
+            )
+        return e
+
     @staticmethod
     def _decode_errors(func):
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
             except pymssql.Error as e:
-                if not isinstance(e.args[-1], str):
-                    e.args = (
-                        (e.args[-1][-1].decode(),)
-                        if isinstance(e.args[-1], tuple)
-                        else (e.args[-1].decode(),)
-                    )
-                raise e
+                raise MSSQL._decode_error(e)
 
         return wrapper
 
@@ -221,6 +226,57 @@ class MSSQL(DBAPI):
         df = DataFrame(rows, columns=columns)
         return df
 
+    def iter_df(
+        self,
+        query: str,
+        params: Optional[dict | tuple | list] = None,
+        chunksize: int = 100_000,
+        convert_bytes: bool | Literal["uuid", "str"] = False,
+        provide_query: bool = False,
+        provide_time: bool = False,
+    ) -> Iterator[DataFrame]:
+        """
+        Потоковое выполнение SQL-запроса к БД и возвращение результата частями в виде DataFrame.
+        В памяти находится только текущая часть строк
+
+        :param query: SQL-запрос
+        :param params: Параметры запроса
+        :param chunksize: Количество строк в одном DataFrame
+        :param convert_bytes: Конвертация bytes значений в uuid.
+            При True или "uuid" - возвращает тип UUID, при str - возвращает строку
+        :param provide_query: Вывод SQL-запроса
+        :param provide_time: Вывод времени выполнения SQL-запроса
+
+        :return генератор DataFrame
+        """
+
+        self._provide_query_info(
+            query=query,
+            params=params,
+            provide_query=provide_query,
+        )
+
+        if self.nolock:
+            query = "SET TRANSACTION ISOLATION LEVEL READ UNCOMMITTED;\n\n" + query
+
+        # Декоратор _decode_errors не применим к генератору: ошибки возникают во время итерации
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    start_time = datetime.now()
+                    cursor.execute(query, params)
+                    columns = [column[0] for column in cursor.description]
+
+                    while rows := cursor.fetchmany(chunksize):
+                        if convert_bytes:
+                            rows = _convert_bytes(rows, as_uuid=False if convert_bytes == "str" else True)
+                        yield DataFrame(rows, columns=columns)
+        except pymssql.Error as e:
+            raise self._decode_error(e)
+
+        if provide_time:
+            print(f"| {'elapsed_time':>12} : {datetime.now() - start_time}")
+
     @_decode_errors
     def insert(
         self,
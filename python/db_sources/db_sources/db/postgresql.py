@@ -1,10 +1,13 @@
+import zlib
 from datetime import datetime
-from typing import Any, Literal
+from typing import Any, Iterator, Literal
 from typing import Optional
 from typing import Type
+from typing import TYPE_CHECKING
 
 import psycopg
 from pandas import DataFrame
+from psycopg import sql
 from psycopg import Cursor
 from psycopg.rows import Row, RowFactory, dict_row, namedtuple_row
 
@@ -12,6 +15,9 @@ from db_sources.exceptions import EmptyDataError
 from ._dbapi import DBAPI
 from ._util import _convert_bytes
 
+if TYPE_CHECKING:
+    from db_sources.storage import S3
+
 
 class PostgreSQL(DBAPI):
     def __init__(
@@ -206,6 +212,53 @@ class PostgreSQL(DBAPI):
         df = DataFrame(rows, columns=columns)
         return df
 
+    def iter_df(
+        self,
+        query: str,
+        params: Optional[dict | tuple | list] = None,
+        chunksize: int = 100_000,
+        convert_bytes: bool | Literal["uuid", "str"] = False,
+        provide_query: bool = False,
+        provide_time: bool = False,
+    ) -> Iterator[DataFrame]:
+        """
+        Потоковое выполнение SQL-запроса к БД и возвращение результата частями в виде DataFrame.
+        Строки читаются серверным курсором, в памяти находится только текущая часть
+
+        :param query: SQL-запрос
+        :param params: Параметры запроса
+        :param chunksize: Количество строк в одном DataFrame
+        :param convert_bytes: Конвертация bytes значений в uuid.
+            При True или "uuid" - возвращает тип UUID, при str - возвращает строку
+        :param provide_query: Вывод SQL-запроса
+        :param provide_time: Вывод времени выполнения SQL-запроса
+
+        :return генератор DataFrame
+        """
+
+        self._provide_query_info(
+            query=query,
+            params=params,
+            provide_query=provide_query,
+        )
+
+        with self.get_connection() as connection:
+            with connection.cursor(name="db_sources_iter_df") as cursor:
+                start_time = datetime.now()
+                cursor.itersize = chunksize
+                cursor.execute(query, params)
+                columns = [column[0] for column in cursor.description]
+
+                while rows := cursor.fetchmany(chunksize):
+                    if convert_bytes:
+                        rows = _convert_bytes(rows, as_uuid=False if convert_bytes == "str" else True)
+                    yield DataFrame(rows, columns=columns)
+
+            connection.commit()
+
+        if provide_time:
+            print(f"| {'elapsed_time':>12} : {datetime.now() - start_time}")
+
     def insert(
         self,
         table: str,
@@ -253,6 +306,92 @@ class PostgreSQL(DBAPI):
 
             connection.commit()
 
+    @staticmethod
+    def _decompress_chunks(chunks: Iterator[bytes], object_name: str) -> Iterator[bytes]:
+        if object_name.endswith((".gz", ".gzip")):
+            decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        elif object_name.endswith((".zst", ".zstd")):
+            import zstandard
+
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            yield from chunks
+            return
+
+        for chunk in chunks:
+            yield decompressor.decompress(chunk)
+        yield decompressor.flush()
+
+    def load_from_s3(
+        self,
+        table: str,
+        source: "S3",
+        object_name: str,
+        bucket: Optional[str] = None,
+        schema: Optional[str] = None,
+        columns: Optional[list] = None,
+        format: Literal["csv", "text"] = "csv",
+        header: bool = True,
+        delimiter: Optional[str] = None,
+        truncate: bool = False,
+        chunk_size: int = 1024 * 1024,
+    ) -> None:
+        """
+        Загрузка файлов из S3 потоком в COPY FROM STDIN, без загрузки файла целиком в память и без pandas.
+        Сжатые файлы (gz, zst) распаковываются на лету. Все файлы загружаются в одной транзакции
+
+        :param table: Наименование таблицы. Поддерживается формат: schema.table, table
+        :param source: Подключение к S3
+        :param object_name: Наименование объекта или glob-шаблон (*, ?). Пример: exports/2024-*/part-*.csv.gz
+        :param bucket: Наименование бакета. По умолчанию - бакет подключения source
+        :param schema: Наименование схемы / БД
+        :param columns: Наименования колонок в порядке следования в файле
+        :param format: Формат COPY: csv или text
+        :param header: Первая строка csv файла - заголовок
+        :param delimiter: Разделитель колонок (один символ). По умолчанию: "," для csv, табуляция для text
+        :param truncate: Очистить таблицу перед вставкой
+        :param chunk_size: Размер части файла, передаваемой в COPY (байт)
+        """
+        schema_table = f"{schema}.{table}" if schema else table
+        columns_query = ""
+        if columns:
+            columns_query = ", ".join([f'"{str(column)}"' for column in columns])
+            columns_query = f"({columns_query})"
+        if format not in ("csv", "text"):
+            raise ValueError(f"Неподдерживаемый формат: {format}. Допустимые значения: csv, text")
+        options = [sql.SQL(f"FORMAT {format}")]
+        if delimiter:
+            if len(delimiter) != 1:
+                raise ValueError("Параметр delimiter должен быть одним символом!")
+            options.append(sql.SQL("DELIMITER {}").format(sql.Literal(delimiter)))
+        if format == "csv":
+            options.append(sql.SQL(f"HEADER {str(header).lower()}"))
+        copy_query = sql.SQL("COPY {} {} FROM STDIN ({})").format(
+            sql.SQL(schema_table),
+            sql.SQL(columns_query),
+            sql.SQL(", ").join(options),
+        )
+
+        object_names = source.match_objects(object_name, bucket=bucket) if any(
+            char in object_name for char in "*?["
+        ) else [object_name]
+        if not object_names:
+            print("it's nothing to insert")
+            return
+
+        with self.get_connection() as connection:
+            with connection.cursor() as cursor:
+                if truncate:
+                    cursor.execute(f"TRUNCATE TABLE {schema_table};")
+
+                for name in object_names:
+                    with source.open_read(object_name=name, bucket=bucket) as body:
+                        with cursor.copy(copy_query) as copy:
+                            for chunk in self._decompress_chunks(body.iter_chunks(chunk_size), name):
+                                copy.write(chunk)
+
+            connection.commit()
+
     def insert_df(
         self,
         df: DataFrame,
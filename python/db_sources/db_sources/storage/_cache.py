@@ -0,0 +1,93 @@
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO
+from typing import Callable
+
+
+STALE_TEMP_SECONDS = 24 * 60 * 60
+
+
+class DiskCache:
+    """
+    Size-bounded LRU cache of S3 objects on local disk, keyed by bucket, key and ETag.
+    Safe for concurrent processes: entries are written to temporary files and renamed atomically,
+    last access time is kept in the file mtime, and open entries stay readable after eviction
+    """
+
+    def __init__(self, directory: Path | str, max_size: int) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, bucket: str, key: str, etag: str) -> Path:
+        digest = hashlib.sha256(f"{bucket}\0{key}\0{etag}".encode()).hexdigest()
+        return self.directory / f"{digest}.object"
+
+    def open(self, bucket: str, key: str, etag: str) -> BinaryIO | None:
+        """
+        Open cached object for reading. Returns None if the object is not cached
+        """
+
+        path = self._path(bucket, key, etag)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return file
+
+    def put(self, bucket: str, key: str, etag: str, write: Callable[[str], None]) -> BinaryIO:
+        """
+        Add object to cache and open it for reading
+
+        :param write: Function that writes the object to the given local path
+        """
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(temp_path)
+            file = open(temp_path, "rb")
+            os.replace(temp_path, self._path(bucket, key, etag))
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        self.evict()
+        return file
+
+    def evict(self) -> None:
+        """
+        Remove least recently used objects until the cache fits in max_size
+        """
+
+        entries = []
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.suffix == ".object":
+                entries.append((stat.st_mtime, stat.st_size, path))
+            elif path.suffix == ".tmp" and stat.st_mtime < time.time() - STALE_TEMP_SECONDS:
+                path.unlink(missing_ok=True)
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+    def clear(self) -> None:
+        """
+        Remove all cached objects
+        """
+
+        for path in self.directory.glob("*.object"):
+            path.unlink(missing_ok=True)
@@ -1,12 +1,240 @@
+import fnmatch
 import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import count
+from itertools import islice
+from io import BufferedIOBase
+from io import BufferedReader
 from io import BytesIO
+from io import RawIOBase
 from pathlib import Path
 from typing import Any
 from typing import BinaryIO
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from urllib.parse import quote
+from uuid import uuid4
 
 import boto3
 import pandas as pd
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
+from botocore.exceptions import BotoCoreError
+from botocore.exceptions import ClientError
+
+from db_sources.db import DBAPI
+from ._cache import DiskCache
+
+
+DELETE_BATCH_SIZE = 1000
+
+COPY_MULTIPART_THRESHOLD = 256 * 1024 * 1024
+
+HIVE_DEFAULT_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+TRANSIENT_ERROR_CODES = ('SlowDown', 'Throttling', 'ThrottlingException', 'RequestTimeout', 'InternalError')
+
+COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.zst': 'zstd',
+    '.zstd': 'zstd',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+}
+
+
+def _serialize_df(
+    df: pd.DataFrame,
+    object_name: str,
+    compression: str = None,
+    row_group_size: int = None,
+) -> bytes:
+    """
+    Serialize DataFrame to bytes in the format given by the object name extension
+    """
+
+    buffer = BytesIO()
+    _, file_type = os.path.splitext(object_name)
+
+    match file_type:
+        case '.csv':
+            df.to_csv(buffer, index=False)
+        case '.xlsx':
+            df.to_excel(buffer, index=False)
+        case '.parquet':
+            df.to_parquet(
+                buffer,
+                index=False,
+                compression=compression or 'snappy',
+                row_group_size=row_group_size,
+            )
+        case '.feather' | '.arrow':
+            df.reset_index(drop=True).to_feather(buffer, compression=compression)
+        case _:
+            raise ValueError(f"Not supported file type: {file_type}")
+
+    return buffer.getvalue()
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in TRANSIENT_ERROR_CODES or status >= 500
+    return isinstance(error, (BotoCoreError, ConnectionError, TimeoutError))
+
+
+class _MultipartWriter(BufferedIOBase):
+    """
+    Writable file-like object that uploads data to S3 in parts while it is being written.
+    At most max_concurrency parts are buffered or in flight at a time
+    """
+
+    def __init__(self, client: Any, bucket: str, key: str, part_size: int, max_concurrency: int) -> None:
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = part_size
+        self._max_concurrency = max_concurrency
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id = None
+        self._executor = None
+        self._futures = []
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data: bytes) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self._part_size:
+            self._submit_part(bytes(self._buffer[:self._part_size]))
+            del self._buffer[:self._part_size]
+        return len(data)
+
+    def _submit_part(self, data: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = self._client.create_multipart_upload(Bucket=self._bucket, Key=self._key)["UploadId"]
+            self._executor = ThreadPoolExecutor(max_workers=self._max_concurrency)
+        self._semaphore.acquire()
+        future = self._executor.submit(self._upload_part, len(self._futures) + 1, data)
+        future.add_done_callback(lambda _: self._semaphore.release())
+        self._futures.append(future)
+
+    def _upload_part(self, part_number: int, data: bytes) -> dict:
+        response = self._client.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self._client.put_object(Bucket=self._bucket, Key=self._key, Body=bytes(self._buffer))
+            else:
+                if self._buffer:
+                    self._submit_part(bytes(self._buffer))
+                parts = [future.result() for future in self._futures]
+                self._client.complete_multipart_upload(
+                    Bucket=self._bucket,
+                    Key=self._key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            if self._executor:
+                self._executor.shutdown()
+            self._buffer = bytearray()
+            super().close()
+
+    def abort(self) -> None:
+        """
+        Discard written data and abort the multipart upload
+        """
+
+        if self._executor:
+            for future in self._futures:
+                future.cancel()
+            self._executor.shutdown()
+        if self._upload_id is not None:
+            self._client.abort_multipart_upload(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id)
+            self._upload_id = None
+        self._buffer = bytearray()
+        super().close()
+
+
+class _RangeReader(RawIOBase):
+    """
+    Seekable read-only file-like object over an S3 object. Every read is a ranged GET,
+    so readers that seek (Parquet, Arrow IPC) download only the byte ranges they need
+    """
+
+    def __init__(self, client: Any, bucket: str, key: str) -> None:
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._size = client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        match whence:
+            case os.SEEK_SET:
+                self._position = offset
+            case os.SEEK_CUR:
+                self._position += offset
+            case os.SEEK_END:
+                self._position = self._size + offset
+        self._position = max(self._position, 0)
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        end = min(self._position + len(buffer), self._size)
+        if end <= self._position:
+            return 0
+        data = self._client.get_object(
+            Bucket=self._bucket,
+            Key=self._key,
+            Range=f"bytes={self._position}-{end - 1}",
+        )["Body"].read()
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
 
 
 class S3:
@@ -17,39 +245,193 @@ class S3:
         secret_key: str,
         bucket: str = None,
         config: Config = None,
+        max_pool_connections: int = 10,
+        retries: int = 5,
+        retry_mode: str = "standard",
+        part_size: int = 8 * 1024 * 1024,
+        max_concurrency: int = 10,
+        cache_dir: Path | str = None,
+        cache_size: int = 1024 ** 3,
     ) -> None:
+        """
+        :param config: botocore Config. Its values take precedence over max_pool_connections and retries
+        :param max_pool_connections: Size of the HTTP connection pool shared by all threads.
+            Should not be less than max_concurrency
+        :param retries: Maximum number of retries for a failed request
+        :param retry_mode: botocore retry mode: legacy, standard or adaptive
+        :param part_size: Part size in bytes for multipart transfers. S3 requires at least 5 MB
+        :param max_concurrency: Number of threads transferring parts of one object
+        :param cache_dir: Local directory for caching downloaded objects. If not specified, cache is disabled.
+            Cached objects are validated by ETag before use. The directory may be shared by several processes
+        :param cache_size: Maximum cache size in bytes. Least recently used objects are evicted
+        """
         self.endpoint_url = endpoint_url
         self.access_key = access_key
         self.secret_key = secret_key
         self.bucket = bucket
         self.config = config
+        self.max_pool_connections = max_pool_connections
+        self.retries = retries
+        self.retry_mode = retry_mode
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self.cache = DiskCache(cache_dir, cache_size) if cache_dir else None
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._session = None
+        self._client = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for name in ("_lock", "_local", "_session", "_client"):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._session = None
+        self._client = None
 
-    def __get_bucket(self, bucket: str) -> Any:
+    def __get_bucket_name(self, bucket: str) -> str:
         bucket = bucket or self.bucket
         if not bucket:
             raise ValueError('Bucket is not specified. Set the "bucket" parameter.')
-        return self.get_connection().Bucket(bucket)
+        return bucket
+
+    def __get_config(self) -> Config:
+        config = Config(
+            max_pool_connections=self.max_pool_connections,
+            retries={"max_attempts": self.retries, "mode": self.retry_mode},
+        )
+        return config.merge(self.config) if self.config else config
+
+    def __get_session(self) -> boto3.session.Session:
+        if self._session is None:
+            self._session = boto3.session.Session(
+                aws_access_key_id=self.access_key,
+                aws_secret_access_key=self.secret_key,
+            )
+        return self._session
+
+    def __get_transfer_config(
+        self,
+        part_size: int = None,
+        max_concurrency: int = None,
+        multipart_threshold: int = None,
+    ) -> TransferConfig:
+        part_size = part_size or self.part_size
+        return TransferConfig(
+            multipart_threshold=multipart_threshold or part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=max_concurrency or self.max_concurrency,
+        )
+
+    def get_client(self) -> Any:
+        """
+        Get S3 client. The client is created once per instance and is safe to share between threads
+        """
+
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self.__get_session().client(
+                        "s3",
+                        endpoint_url=self.endpoint_url,
+                        config=self.__get_config(),
+                    )
+        return self._client
 
     def get_connection(self, **kwargs) -> Any:
         """
-        Get connection to S3
+        Get connection to S3. Without arguments the resource is cached per thread,
+        because boto3 resources are not thread-safe
         """
 
-        return boto3.resource(
-            "s3",
-            endpoint_url=self.endpoint_url,
-            aws_access_key_id=self.access_key,
-            aws_secret_access_key=self.secret_key,
-            config=self.config,
-            **kwargs
-        )
+        if kwargs:
+            with self._lock:
+                return self.__get_session().resource(
+                    "s3",
+                    endpoint_url=self.endpoint_url,
+                    config=self.__get_config(),
+                    **kwargs
+                )
+
+        resource = getattr(self._local, "resource", None)
+        if resource is None:
+            with self._lock:
+                resource = self.__get_session().resource(
+                    "s3",
+                    endpoint_url=self.endpoint_url,
+                    config=self.__get_config(),
+                )
+            self._local.resource = resource
+        return resource
 
     def get_buckets(self) -> tuple:
         """
         Get tuple of buckets
         """
 
-        return tuple(bucket.name for bucket in self.get_connection().buckets.all())
+        return tuple(bucket["Name"] for bucket in self.get_client().list_buckets()["Buckets"])
+
+    def iter_objects(
+        self,
+        prefix: str = None,
+        bucket: str = None,
+        delimiter: str = None,
+        page_size: int = 1000,
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over objects in bucket. Pages are requested as the iterator is consumed.
+        Yields dicts with keys: key, size, etag, last_modified. With delimiter, common prefixes
+        ("directories") are yielded as well, with size, etag and last_modified set to None
+
+        :param prefix: Get objects with prefix. Optional
+        :param bucket: Bucket name. Optional
+        :param delimiter: Group keys by delimiter, for example "/". Optional
+        :param page_size: Number of keys requested per page, at most 1000
+        """
+
+        paginator = self.get_client().get_paginator("list_objects_v2")
+        pages = paginator.paginate(
+            Bucket=self.__get_bucket_name(bucket),
+            Prefix=prefix or "",
+            Delimiter=delimiter or "",
+            PaginationConfig={"PageSize": page_size},
+        )
+        for page in pages:
+            for common_prefix in page.get("CommonPrefixes", ()):
+                yield {"key": common_prefix["Prefix"], "size": None, "etag": None, "last_modified": None}
+            for obj in page.get("Contents", ()):
+                yield {
+                    "key": obj["Key"],
+                    "size": obj["Size"],
+                    "etag": obj["ETag"],
+                    "last_modified": obj["LastModified"],
+                }
+
+    def match_objects(
+        self,
+        pattern: str,
+        bucket: str = None,
+    ) -> list[str]:
+        """
+        Get object names matching glob pattern with * and ?. Only keys under the pattern's
+        literal prefix are listed. Example: exports/2024-*/part-*.csv.gz
+
+        :param pattern: Glob pattern of object names
+        :param bucket: Bucket name. Optional
+        """
+
+        prefix = re.split(r"[*?\[]", pattern, maxsplit=1)[0]
+        return [
+            obj["key"]
+            for obj in self.iter_objects(prefix=prefix, bucket=bucket)
+            if fnmatch.fnmatchcase(obj["key"], pattern)
+        ]
 
     def get_objects(
         self,
@@ -63,103 +445,499 @@ class S3:
         :param bucket: Bucket name. Optional
         """
 
-        if prefix:
-            return tuple(
-                obj.key
-                for obj in self.__get_bucket(bucket).objects.filter(Prefix=prefix).all()
-            )
-        else:
-            return tuple(obj.key for obj in self.__get_bucket(bucket).objects.all())
+        return tuple(obj["key"] for obj in self.iter_objects(prefix=prefix, bucket=bucket))
 
     def upload(
         self,
         file: BytesIO | BinaryIO | Path | str,
         object_name: str,
         bucket: str = None,
+        part_size: int = None,
+        max_concurrency: int = None,
     ) -> None:
         """
-        Upload file to S3
+        Upload file to S3. Files larger than part_size are uploaded in parts by several threads
 
         :param file: File-like object or path to local file
         :param object_name: Object name in S3. Example: path/to/file
         :param bucket: Bucket name. Optional
+        :param part_size: Part size in bytes. Optional
+        :param max_concurrency: Number of upload threads. Optional
         """
 
+        bucket = self.__get_bucket_name(bucket)
+        transfer_config = self.__get_transfer_config(part_size, max_concurrency)
         if isinstance(file, (Path, str)):
-            self.__get_bucket(bucket).upload_file(file, object_name)
+            self.get_client().upload_file(str(file), bucket, object_name, Config=transfer_config)
         else:
-            self.__get_bucket(bucket).Object(object_name).put(Body=file)
+            self.get_client().upload_fileobj(file, bucket, object_name, Config=transfer_config)
+
+    @contextmanager
+    def open_write(
+        self,
+        object_name: str,
+        bucket: str = None,
+        part_size: int = None,
+        max_concurrency: int = None,
+    ) -> Iterator[BufferedIOBase]:
+        """
+        Open object in S3 for writing. Written data is uploaded in parts in the background,
+        so memory usage is bounded by part_size * max_concurrency. The object is created
+        on exit; if an exception is raised, the upload is aborted
+
+        :param object_name: Object name in S3. Example: path/to/file
+        :param bucket: Bucket name. Optional
+        :param part_size: Part size in bytes, at least 5 MB. Optional
+        :param max_concurrency: Number of upload threads. Optional
+        """
+
+        writer = _MultipartWriter(
+            client=self.get_client(),
+            bucket=self.__get_bucket_name(bucket),
+            key=object_name,
+            part_size=part_size or self.part_size,
+            max_concurrency=max_concurrency or self.max_concurrency,
+        )
+        try:
+            yield writer
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
 
     def upload_df(
         self,
         df: pd.DataFrame,
         object_name: str,
         bucket: str = None,
+        compression: str = None,
+        row_group_size: int = None,
     ) -> None:
         """
-        Upload DataFrame to S3. Supported formats: csv, xlsx
+        Upload DataFrame to S3. Supported formats: csv, xlsx, parquet, feather, arrow.
+        Parquet and Feather/Arrow IPC require pyarrow
 
         :param df: DataFrame
         :param object_name: Object name in S3. Example: path/to/file
         :param bucket: Bucket name. Optional
+        :param compression: Compression codec. parquet: snappy (default), gzip, brotli, lz4, zstd, none;
+            feather, arrow: lz4 (default), zstd, uncompressed. Optional
+        :param row_group_size: Maximum number of rows in a Parquet row group. Optional
         """
 
-        buffer = BytesIO()
-        _, file_type = os.path.splitext(object_name)
+        data = _serialize_df(df, object_name, compression=compression, row_group_size=row_group_size)
+        self.upload(file=BytesIO(data), object_name=object_name, bucket=bucket)
 
-        match file_type:
-            case '.csv':
-                df.to_csv(buffer, index=False)
-            case '.xlsx':
-                df.to_excel(buffer, index=False)
-            case _:
-                raise ValueError(f"Not supported file type: {file_type}")
+    def __upload_with_retries(
+        self,
+        file: BytesIO | BinaryIO | Path | str | bytes,
+        object_name: str,
+        bucket: str,
+        retries: int,
+    ) -> dict:
+        start_position = file.tell() if hasattr(file, "seek") else None
+        for attempt in range(1, retries + 2):
+            try:
+                if start_position is not None:
+                    file.seek(start_position)
+                self.upload(
+                    file=BytesIO(file) if isinstance(file, bytes) else file,
+                    object_name=object_name,
+                    bucket=bucket,
+                )
+                return {"key": object_name, "status": "ok", "attempts": attempt, "error": None}
+            except Exception as e:
+                if attempt > retries or not _is_transient(e):
+                    return {"key": object_name, "status": "error", "attempts": attempt, "error": repr(e)}
+                time.sleep(min(2 ** (attempt - 1), 30))
+
+    def upload_many(
+        self,
+        files: dict | Iterable[tuple],
+        bucket: str = None,
+        max_workers: int = None,
+        retries: int = 3,
+    ) -> list[dict]:
+        """
+        Upload many files to S3 in parallel. Transient failures (throttling, 5xx, connection errors)
+        are retried with exponential backoff; an error does not stop other uploads
+
+        :param files: Dict or pairs {object_name: file}, file is a file-like object, bytes or path to local file
+        :param bucket: Bucket name. Optional
+        :param max_workers: Number of concurrent uploads. By default max_concurrency
+        :param retries: Number of retries for a transient failure
+        :return: Results in input order: dicts with keys key, status ("ok" or "error"), attempts, error
+        """
+
+        items = list(files.items() if isinstance(files, dict) else files)
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_concurrency) as executor:
+            futures = [
+                executor.submit(self.__upload_with_retries, file, object_name, bucket, retries)
+                for object_name, file in items
+            ]
+        return [future.result() for future in futures]
+
+    def upload_df_many(
+        self,
+        dfs: dict | Iterable[tuple],
+        bucket: str = None,
+        max_workers: int = None,
+        processes: int = None,
+        retries: int = 3,
+        compression: str = None,
+        row_group_size: int = None,
+    ) -> list[dict]:
+        """
+        Upload many DataFrames to S3. DataFrames are serialized in a process pool and uploaded
+        in a thread pool as soon as they are ready; at most processes + max_workers DataFrames are
+        being serialized or uploaded at a time. Supported formats are the same as in upload_df
+
+        :param dfs: Dict or pairs {object_name: DataFrame}
+        :param bucket: Bucket name. Optional
+        :param max_workers: Number of concurrent uploads. By default max_concurrency
+        :param processes: Number of serialization processes. By default os.cpu_count()
+        :param retries: Number of retries for a transient upload failure
+        :param compression: Compression codec, see upload_df. Optional
+        :param row_group_size: Maximum number of rows in a Parquet row group. Optional
+        :return: Results in input order: dicts with keys key, status ("ok" or "error"), attempts, error
+        """
+
+        max_workers = max_workers or self.max_concurrency
+        processes = processes or os.cpu_count()
+        semaphore = threading.BoundedSemaphore(processes + max_workers)
+        results = []
+
+        def upload(object_name: str, serialized: Future) -> dict:
+            try:
+                error = serialized.exception()
+                if error is not None:
+                    return {"key": object_name, "status": "error", "attempts": 0, "error": repr(error)}
+                return self.__upload_with_retries(serialized.result(), object_name, bucket, retries)
+            finally:
+                semaphore.release()
+
+        def submit_upload(object_name: str, result: Future) -> Callable[[Future], None]:
+            def callback(serialized: Future) -> None:
+                thread_pool.submit(upload, object_name, serialized).add_done_callback(
+                    lambda uploaded: result.set_result(uploaded.result())
+                )
+
+            return callback
+
+        with ThreadPoolExecutor(max_workers=max_workers) as thread_pool, \
+                ProcessPoolExecutor(max_workers=processes) as process_pool:
+            for object_name, df in (dfs.items() if isinstance(dfs, dict) else dfs):
+                semaphore.acquire()
+                result = Future()
+                process_pool.submit(_serialize_df, df, object_name, compression, row_group_size).add_done_callback(
+                    submit_upload(object_name, result)
+                )
+                results.append(result)
+
+        return [result.result() for result in results]
 
-        buffer.seek(0)
-        self.upload(file=buffer, object_name=object_name, bucket=bucket)
+    def __download_cached(self, bucket: str, object_name: str) -> BinaryIO:
+        etag = self.get_client().head_object(Bucket=bucket, Key=object_name)["ETag"]
+        file = self.cache.open(bucket, object_name, etag)
+        if file is None:
+            def write(path: str) -> None:
+                body = self.get_client().get_object(Bucket=bucket, Key=object_name, IfMatch=etag)["Body"]
+                with body, open(path, "wb") as target:
+                    shutil.copyfileobj(body, target, length=self.part_size)
+
+            file = self.cache.put(bucket, object_name, etag, write)
+        return file
 
     def download(
         self,
         object_name: str,
         path: Path | str = None,
         bucket: str = None,
+        part_size: int = None,
+        max_concurrency: int = None,
+        use_cache: bool = True,
     ) -> BytesIO | None:
         """
-        Download file from S3
+        Download file from S3. Objects larger than part_size are downloaded by ranges in several threads
 
         :param object_name: Object name in S3. Example: path/to/file
         :param path: Local path to save file. If not specified, return file-like object
         :param bucket: Bucket name. Optional
+        :param part_size: Part size in bytes. Optional
+        :param max_concurrency: Number of download threads. Optional
+        :param use_cache: Use local cache if cache_dir is specified. A cached object is used only if its ETag
+            matches the object in S3, otherwise the object is downloaded again
         """
 
+        bucket = self.__get_bucket_name(bucket)
+        if self.cache and use_cache:
+            with self.__download_cached(bucket, object_name) as file:
+                if path:
+                    with open(path, "wb") as target:
+                        shutil.copyfileobj(file, target)
+                    return None
+                return BytesIO(file.read())
+
+        transfer_config = self.__get_transfer_config(part_size, max_concurrency)
         if path:
-            self.__get_bucket(bucket).download_file(object_name, path)
+            self.get_client().download_file(bucket, object_name, str(path), Config=transfer_config)
         else:
-            file = self.__get_bucket(bucket).Object(object_name).get()["Body"].read()
-            return BytesIO(file)
+            file = BytesIO()
+            self.get_client().download_fileobj(bucket, object_name, file, Config=transfer_config)
+            file.seek(0)
+            return file
+
+    @contextmanager
+    def open_read(
+        self,
+        object_name: str,
+        bucket: str = None,
+    ) -> Iterator[Any]:
+        """
+        Open object in S3 for streaming reading. Returns botocore StreamingBody:
+        read(size), iter_chunks(chunk_size) and iter_lines() fetch data from the network
+        as it is consumed, without loading the whole object into memory
+
+        :param object_name: Object name in S3. Example: path/to/file
+        :param bucket: Bucket name. Optional
+        """
+
+        body = self.get_client().get_object(Bucket=self.__get_bucket_name(bucket), Key=object_name)["Body"]
+        try:
+            yield body
+        finally:
+            body.close()
 
     def download_df(
         self,
         object_name: str,
         bucket: str = None,
+        columns: list = None,
+        filters: list = None,
+        use_cache: bool = True,
     ) -> pd.DataFrame:
         """
-        Download file as DataFrame from S3. Supported formats: csv, xlsx, xls
+        Download file as DataFrame from S3. Supported formats: csv, xlsx, parquet, feather, arrow.
+        Without cache Parquet and Feather/Arrow IPC files are read with ranged GETs: only the footer and
+        the selected columns (and, for Parquet, the row groups matching filters) are downloaded
 
         :param object_name: Object name in S3. Example: path/to/file
         :param bucket: Bucket name. Optional
+        :param columns: Columns to read. Optional
+        :param filters: Parquet row filters in pyarrow format. Row groups are skipped by their statistics.
+            Example: [("date", ">=", date(2024, 1, 1)), ("region", "in", [1, 2])]. Optional
+        :param use_cache: Use local cache if cache_dir is specified
         """
         _, file_type = os.path.splitext(object_name)
-        file = self.download(object_name=object_name, bucket=bucket)
+
+        if filters and file_type != '.parquet':
+            raise ValueError(f"Filters are supported only for parquet files, got: {file_type}")
+
+        if file_type in ('.parquet', '.feather', '.arrow') and not (self.cache and use_cache):
+            file = BufferedReader(
+                _RangeReader(self.get_client(), self.__get_bucket_name(bucket), object_name),
+                buffer_size=64 * 1024,
+            )
+        elif file_type in ('.csv', '.xlsx', '.parquet', '.feather', '.arrow'):
+            file = self.download(object_name=object_name, bucket=bucket, use_cache=use_cache)
+        else:
+            raise ValueError(f"Not supported file type: {file_type}")
 
         match file_type:
+            case '.parquet':
+                import pyarrow.parquet as pq
+
+                return pq.read_table(file, columns=columns, filters=filters).to_pandas()
+            case '.feather' | '.arrow':
+                import pyarrow.feather as feather
+
+                return feather.read_table(file, columns=columns, memory_map=False).to_pandas()
             case '.csv':
-                return pd.read_csv(file)
+                return pd.read_csv(file, usecols=columns)
             case '.xlsx':
-                return pd.read_excel(file, engine='openpyxl')
+                return pd.read_excel(file, engine='openpyxl', usecols=columns)
+
+    def iter_df(
+        self,
+        object_name: str,
+        chunksize: int = 100_000,
+        bucket: str = None,
+        compression: str = 'infer',
+        columns: list = None,
+        **kwargs,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Read file from S3 as DataFrames of chunksize rows. Supported formats: csv, parquet.
+        The object is streamed and decompressed on the fly, so memory usage does not depend on file size.
+        Example: for df in s3.iter_df('path/to/file.csv.gz'): ch.insert_df(df, table)
+
+        :param object_name: Object name in S3. Example: path/to/file.csv.gz
+        :param chunksize: Number of rows in one DataFrame
+        :param bucket: Bucket name. Optional
+        :param compression: CSV compression: gzip, zstd (requires zstandard), bz2, xz or None.
+            By default inferred from the object name extension
+        :param columns: Columns to read. Optional
+        :param kwargs: Additional parameters for pandas.read_csv. Optional
+        """
+
+        name, file_type = os.path.splitext(object_name)
+        if compression == 'infer':
+            compression = COMPRESSION_EXTENSIONS.get(file_type)
+            if compression:
+                _, file_type = os.path.splitext(name)
+
+        match file_type:
+            case '.csv':
+                with self.open_read(object_name=object_name, bucket=bucket) as body:
+                    with pd.read_csv(
+                        body,
+                        chunksize=chunksize,
+                        compression=compression,
+                        usecols=columns,
+                        **kwargs,
+                    ) as reader:
+                        yield from reader
+            case '.parquet':
+                import pyarrow.parquet as pq
+
+                file = BufferedReader(
+                    _RangeReader(self.get_client(), self.__get_bucket_name(bucket), object_name),
+                    buffer_size=64 * 1024,
+                )
+                for batch in pq.ParquetFile(file).iter_batches(batch_size=chunksize, columns=columns):
+                    yield batch.to_pandas()
             case _:
                 raise ValueError(f"Not supported file type: {file_type}")
 
+    @staticmethod
+    def __partition_value(value: Any) -> str:
+        if pd.isna(value):
+            return HIVE_DEFAULT_PARTITION
+        if isinstance(value, pd.Timestamp) and value == value.normalize():
+            value = value.date()
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return quote(str(value), safe=" -_.:")
+
+    @staticmethod
+    def __promote_null_fields(schema: Any, other: Any) -> Any:
+        import pyarrow as pa
+
+        return pa.schema([
+            other.field(field.name) if pa.types.is_null(field.type) and field.name in other.names else field
+            for field in schema
+        ])
+
+    def export_query(
+        self,
+        source: DBAPI,
+        query: str,
+        prefix: str,
+        bucket: str = None,
+        params: dict | tuple | list = None,
+        partition_by: str | list = None,
+        target_file_size: int = 128 * 1024 * 1024,
+        chunksize: int = 100_000,
+        compression: str = 'snappy',
+        max_workers: int = None,
+        schema: Any = None,
+    ) -> list[dict]:
+        """
+        Export query result from any database connector to S3 as Parquet files (requires pyarrow).
+        The query is read in chunks (source.iter_df), rows are written to Hive-style partitions
+        prefix/column=value/part-NNNNN-<id>.parquet, and each file is uploaded in the background
+        as soon as it reaches target_file_size, while the next chunks are fetched.
+        Memory usage is about target_file_size per partition being written.
+        One schema is resolved per partition: columns that are NULL in the leading chunks take the type
+        of their first non-NULL values, so pass schema when a column may be NULL for a whole file.
+        Example: s3.export_query(ch, "SELECT *, toDate(ts) AS date FROM t", "export/t", partition_by="date")
+
+        :param source: Database connector: ClickHouse, PostgreSQL, MSSQL
+        :param query: SQL query
+        :param prefix: Object name prefix in S3. Example: path/to/dataset
+        :param bucket: Bucket name. Optional
+        :param params: Query parameters. Optional
+        :param partition_by: Partition column or list of columns. Partition columns are not written
+            to the files, their values are encoded in the object names. Optional
+        :param target_file_size: Approximate size of one Parquet file in bytes
+        :param chunksize: Number of rows fetched from the database at a time, also the row group size
+        :param compression: Parquet compression codec: snappy, gzip, brotli, lz4, zstd, none
+        :param max_workers: Number of concurrent uploads. By default max_concurrency
+        :param schema: pyarrow.Schema of the written columns (without partition columns). Optional
+        :return: List of uploaded files: dicts with keys key, rows, size
+        """
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        bucket = self.__get_bucket_name(bucket)
+        partition_by = [partition_by] if isinstance(partition_by, str) else list(partition_by or [])
+        max_workers = max_workers or self.max_concurrency
+        semaphore = threading.BoundedSemaphore(2 * max_workers)
+        file_numbers = count()
+        export_id = uuid4().hex[:8]
+        files = {}
+        schemas = {}
+        futures = []
+
+        def upload(key: str, data: Any, rows: int) -> dict:
+            try:
+                self.upload(file=pa.BufferReader(data), object_name=key, bucket=bucket)
+            finally:
+                semaphore.release()
+            return {"key": key, "rows": rows, "size": data.size}
+
+        def open_writer(entry: dict) -> None:
+            entry["writer"] = pq.ParquetWriter(entry["sink"], entry["schema"], compression=compression)
+            for table in entry.pop("pending"):
+                entry["writer"].write_table(table.cast(entry["schema"]))
+
+        def flush(path: str) -> None:
+            entry = files.pop(path)
+            if entry["writer"] is None:
+                open_writer(entry)
+            entry["writer"].close()
+            semaphore.acquire()
+            key = f"{path}/part-{next(file_numbers):05d}-{export_id}.parquet"
+            futures.append(executor.submit(upload, key, entry["sink"].getvalue(), entry["rows"]))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for df in source.iter_df(query=query, params=params, chunksize=chunksize):
+                groups = df.groupby(partition_by, dropna=False, sort=False) if partition_by else [((), df)]
+                for values, part in groups:
+                    path = "/".join([
+                        prefix.rstrip("/"),
+                        *(f"{column}={self.__partition_value(value)}" for column, value in zip(partition_by, values)),
+                    ])
+                    table = pa.Table.from_pandas(part.drop(columns=partition_by), schema=schema, preserve_index=False)
+                    schemas[path] = self.__promote_null_fields(schemas.get(path, table.schema), table.schema)
+                    if path in files and files[path]["writer"] is not None and files[path]["schema"] != schemas[path]:
+                        # The file was opened with a null-typed column that now has values: start a new file
+                        flush(path)
+                    if path not in files:
+                        files[path] = {"writer": None, "sink": pa.BufferOutputStream(), "rows": 0, "pending": []}
+                    entry = files[path]
+                    entry["rows"] += table.num_rows
+                    if entry["writer"] is not None:
+                        entry["writer"].write_table(table.cast(entry["writer"].schema))
+                    else:
+                        # Writer is opened once no column is null-typed, so that a column that is NULL
+                        # in the leading chunks gets the type of its later values
+                        entry["pending"].append(table)
+                        entry["schema"] = schemas[path]
+                        if (
+                            not any(pa.types.is_null(field.type) for field in entry["schema"])
+                            or sum(pending.nbytes for pending in entry["pending"]) >= target_file_size
+                        ):
+                            open_writer(entry)
+                    if entry["sink"].tell() >= target_file_size:
+                        flush(path)
+
+            for path in list(files):
+                flush(path)
+
+        return [future.result() for future in futures]
+
     def delete(
         self,
         object_name: str,
@@ -172,4 +950,190 @@ class S3:
         :param bucket: Bucket name. Optional
         """
 
-        self.__get_bucket(bucket).Object(object_name).delete()
+        self.get_client().delete_object(Bucket=self.__get_bucket_name(bucket), Key=object_name)
+
+    def delete_many(
+        self,
+        object_names: Iterable[str],
+        bucket: str = None,
+        max_workers: int = None,
+    ) -> list[dict]:
+        """
+        Delete objects from S3 with DeleteObjects requests of up to 1000 keys, sent in parallel.
+        object_names may be a lazy iterator, at most 2 * max_workers batches are held in memory
+
+        :param object_names: Object names in S3
+        :param bucket: Bucket name. Optional
+        :param max_workers: Number of parallel requests. By default max_concurrency
+        :return: List of errors: dicts with keys key, code, message
+        """
+
+        bucket = self.__get_bucket_name(bucket)
+        max_workers = max_workers or self.max_concurrency
+        semaphore = threading.BoundedSemaphore(2 * max_workers)
+
+        def delete_batch(keys: list[str]) -> list[dict]:
+            try:
+                response = self.get_client().delete_objects(
+                    Bucket=bucket,
+                    Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+                )
+            finally:
+                semaphore.release()
+            return [
+                {"key": error["Key"], "code": error.get("Code"), "message": error.get("Message")}
+                for error in response.get("Errors", ())
+            ]
+
+        object_names = iter(object_names)
+        futures = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while keys := list(islice(object_names, DELETE_BATCH_SIZE)):
+                semaphore.acquire()
+                futures.append(executor.submit(delete_batch, keys))
+        return [error for future in futures for error in future.result()]
+
+    def delete_prefix(
+        self,
+        prefix: str,
+        bucket: str = None,
+        max_workers: int = None,
+    ) -> list[dict]:
+        """
+        Delete all objects with prefix from S3
+
+        :param prefix: Prefix of objects to delete. Example: path/to/dir/
+        :param bucket: Bucket name. Optional
+        :param max_workers: Number of parallel requests. By default max_concurrency
+        :return: List of errors: dicts with keys key, code, message
+        """
+
+        if not prefix:
+            raise ValueError('Prefix is not specified. Use delete_many to delete all objects in bucket.')
+
+        return self.delete_many(
+            (obj["key"] for obj in self.iter_objects(prefix=prefix, bucket=bucket)),
+            bucket=bucket,
+            max_workers=max_workers,
+        )
+
+    def copy(
+        self,
+        source_object: str,
+        object_name: str,
+        bucket: str = None,
+        source_bucket: str = None,
+        part_size: int = None,
+        max_concurrency: int = None,
+        multipart_threshold: int = COPY_MULTIPART_THRESHOLD,
+    ) -> None:
+        """
+        Copy object on the S3 side, data does not pass through the client. Objects smaller than
+        multipart_threshold are copied with CopyObject, larger ones with parallel UploadPartCopy
+
+        :param source_object: Source object name. Example: path/to/file
+        :param object_name: Target object name. Example: archive/path/to/file
+        :param bucket: Target bucket name. Optional
+        :param source_bucket: Source bucket name. By default the target bucket
+        :param part_size: Part size in bytes for multipart copy. Optional
+        :param max_concurrency: Number of threads copying parts of one object. Optional
+        :param multipart_threshold: Object size in bytes from which multipart copy is used
+        """
+
+        bucket = self.__get_bucket_name(bucket)
+        self.get_client().copy(
+            CopySource={"Bucket": source_bucket or bucket, "Key": source_object},
+            Bucket=bucket,
+            Key=object_name,
+            Config=self.__get_transfer_config(part_size, max_concurrency, multipart_threshold),
+        )
+
+    def move(
+        self,
+        source_object: str,
+        object_name: str,
+        bucket: str = None,
+        source_bucket: str = None,
+        part_size: int = None,
+        max_concurrency: int = None,
+    ) -> None:
+        """
+        Move object on the S3 side: server-side copy, then delete the source
+
+        :param source_object: Source object name. Example: path/to/file
+        :param object_name: Target object name. Example: archive/path/to/file
+        :param bucket: Target bucket name. Optional
+        :param source_bucket: Source bucket name. By default the target bucket
+        :param part_size: Part size in bytes for multipart copy. Optional
+        :param max_concurrency: Number of threads copying parts of one object. Optional
+        """
+
+        self.copy(
+            source_object=source_object,
+            object_name=object_name,
+            bucket=bucket,
+            source_bucket=source_bucket,
+            part_size=part_size,
+            max_concurrency=max_concurrency,
+        )
+        self.delete(object_name=source_object, bucket=source_bucket or bucket)
+
+    def copy_prefix(
+        self,
+        source_prefix: str,
+        prefix: str,
+        bucket: str = None,
+        source_bucket: str = None,
+        max_workers: int = None,
+        delete_source: bool = False,
+    ) -> list[dict]:
+        """
+        Copy all objects with source_prefix to prefix on the S3 side. The full listing is taken
+        before copying starts, then objects are copied in parallel.
+        Within one bucket the prefixes must not overlap, otherwise copies would land among the sources.
+        Example: s3.copy_prefix("exports/2024-01/", "archive/2024/01/", delete_source=True)
+
+        :param source_prefix: Prefix of source objects
+        :param prefix: Target prefix, replaces source_prefix in object names
+        :param bucket: Target bucket name. Optional
+        :param source_bucket: Source bucket name. By default the target bucket
+        :param max_workers: Number of objects copied in parallel. By default max_concurrency
+        :param delete_source: Delete successfully copied source objects (move)
+        :return: Results in listing order: dicts with keys source, key, status ("ok" or "error"), error
+        """
+
+        bucket = self.__get_bucket_name(bucket)
+        source_bucket = source_bucket or bucket
+        if source_bucket == bucket and (prefix.startswith(source_prefix) or source_prefix.startswith(prefix)):
+            raise ValueError('Source and target prefixes overlap in the same bucket.')
+
+        def copy_object(source_object: str) -> dict:
+            object_name = prefix + source_object[len(source_prefix):]
+            result = {"source": source_object, "key": object_name, "status": "ok", "error": None}
+            try:
+                self.copy(
+                    source_object=source_object,
+                    object_name=object_name,
+                    bucket=bucket,
+                    source_bucket=source_bucket,
+                    max_concurrency=1,
+                )
+            except Exception as e:
+                result.update(status="error", error=repr(e))
+            return result
+
+        source_objects = [obj["key"] for obj in self.iter_objects(prefix=source_prefix, bucket=source_bucket)]
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_concurrency) as executor:
+            results = list(executor.map(copy_object, source_objects))
+
+        if delete_source:
+            errors = self.delete_many(
+                (result["source"] for result in results if result["status"] == "ok"),
+                bucket=source_bucket,
+                max_workers=max_workers,
+            )
+            for error in errors:
+                print(f"| {'not deleted':>12} : {error['key']} {error['code']}")
+
+        return results
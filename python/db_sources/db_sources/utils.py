@@ -1,10 +1,18 @@
+import hashlib
+import json
 import os
+import tempfile
+import threading
+import time
 from base64 import b64encode
 from binascii import hexlify, unhexlify
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Literal
 from uuid import UUID
 
 import requests
+from requests.adapters import HTTPAdapter
 from pandas._libs import NaTType
 from pandas._libs.missing import NAType
 
@@ -84,18 +92,75 @@ def convert_guid_to_binary(
     return unhexlify(binary)
 
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session(pool_size: int = 10) -> requests.Session:
+    """
+    Общая HTTP-сессия модуля (пул соединений переиспользуется между вызовами)
+    """
+
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+    return _session
+
+
+def _variables_cache_path(host: str, login: str, cache_dir: str | Path = None) -> Path:
+    cache_dir = Path(cache_dir) if cache_dir else Path.home() / ".cache" / "db_sources"
+    digest = hashlib.sha256(f"{host}\0{login}".encode()).hexdigest()[:16]
+    return cache_dir / f"airflow_variables_{digest}.json"
+
+
+def _read_variables_cache(path: Path, ttl: int) -> dict | None:
+    try:
+        with open(path) as file:
+            cache = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return
+    if time.time() - cache["created"] > ttl:
+        return
+    return cache["variables"]
+
+
+def _write_variables_cache(path: Path, variables: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        os.chmod(temp_path, 0o600)
+        with os.fdopen(fd, "w") as file:
+            json.dump({"created": time.time(), "variables": variables}, file)
+        os.replace(temp_path, path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
 def get_variables(
         login: str = None,
         password: str = None,
-        host: str = None
-):
+        host: str = None,
+        page_size: int = 100,
+        max_workers: int = 8,
+        cache_ttl: int = 300,
+        cache_dir: str | Path = None,
+) -> dict:
     """
     Функция получения переменных окружения из Airflow
 
     :param login: Логин Airflow. Если не указан, берётся переменная <AIRFLOW_LOGIN>
     :param password: Пароль Airflow. Если не указан, берётся переменная <AIRFLOW_PASSWORD>
     :param host: Адрес Airflow
-
+    :param page_size: Количество переменных на странице. Сервер может ограничить его (maximum_page_limit)
+    :param max_workers: Количество параллельных запросов страниц
+    :param cache_ttl: Время жизни локального кэша переменных (сек). 0 - кэш не используется
+    :param cache_dir: Папка кэша. По умолчанию ~/.cache/db_sources. Файл кэша доступен только владельцу
+    :return: словарь переменных
     """
     if login is None:
         login = os.getenv("AIRFLOW_LOGIN")
@@ -109,19 +174,42 @@ def get_variables(
     else:
         raise AttributeError("Не указан логин и/или пароль!")
 
-    response = requests.get(
-        url=f"{host}/api/v1/variables",
-        headers={"Authorization": api_key},
-        params={"limit": 1000},
-    )
-
-    if response.status_code == 200:
-        variables: list[dict] = response.json()["variables"]
-    else:
-        response.raise_for_status()
-        return
-
-    for variable in variables:
-        key = variable.get("key")
-        value = variable.get("value")
+    cache_path = _variables_cache_path(host=host, login=login, cache_dir=cache_dir)
+    variables = _read_variables_cache(cache_path, ttl=cache_ttl) if cache_ttl else None
+
+    if variables is None:
+        session = _get_session(pool_size=max_workers)
+
+        def get_page(offset: int) -> dict:
+            response = session.get(
+                url=f"{host}/api/v1/variables",
+                headers={"Authorization": api_key},
+                params={"limit": page_size, "offset": offset},
+            )
+            response.raise_for_status()
+            return response.json()
+
+        first_page = get_page(0)
+        pages = [first_page["variables"]]
+        total_entries = first_page.get("total_entries", len(pages[0]))
+        # шаг - фактический размер первой страницы, т.к. сервер может уменьшить limit
+        step = len(pages[0])
+        if step and total_entries > step:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pages += [
+                    page["variables"]
+                    for page in executor.map(get_page, range(step, total_entries, step))
+                ]
+
+        variables = {
+            variable.get("key"): variable.get("value")
+            for page in pages
+            for variable in page
+        }
+        if cache_ttl:
+            _write_variables_cache(cache_path, variables)
+
+    for key, value in variables.items():
         os.environ[key] = value
+
+    return variables
@@ -0,0 +1,104 @@
+import time
+from datetime import datetime
+
+from pandas import DataFrame
+
+import config
+from db_sources import ClickHouse
+from db_sources.db.clickhouse import PROFILES
+
+
+def bench_reload_df(rows: int = 1_000_000) -> None:
+    """
+    Сравнение truncate + insert_df и reload_df на локальном ClickHouse (tests/docker)
+    """
+    ch = config.dbs.ClickHouse
+    df = DataFrame(
+        [(i, f"attr{i}") for i in range(rows)],
+        columns=config.COLUMN_NAMES,
+    )
+
+    ch.execute(config.ch_ddl.create_test_table)
+
+    start_time = datetime.now()
+    ch.insert_df(df=df, table=config.TABLE, truncate=True)
+    print(f"| {'truncate+insert':>16} : {datetime.now() - start_time}")
+
+    start_time = datetime.now()
+    ch.reload_df(df=df, table=config.TABLE)
+    print(f"| {'reload_df':>16} : {datetime.now() - start_time}")
+
+    ch.execute(config.ch_ddl.drop_test_table)
+
+
+def bench_profiles(rows: int = 5_000_000) -> None:
+    """
+    Пропускная способность и затраты CPU клиента для профилей сжатия на локальном ClickHouse (tests/docker)
+    """
+    query = f"select number, toString(number), now() from numbers({rows})"
+
+    for profile in [None, *PROFILES]:
+        ch = ClickHouse(host="localhost", user="default", profile=profile)
+
+        start_time, start_cpu = time.perf_counter(), time.process_time()
+        ch.execute_to_list(query)
+        elapsed, cpu = time.perf_counter() - start_time, time.process_time() - start_cpu
+
+        print(
+            f"| {str(profile):>16} : {elapsed:.2f} s, {rows / elapsed:,.0f} rows/s, cpu {cpu:.2f} s"
+        )
+
+
+def bench_load_from_s3(rows: int = 1_000_000) -> None:
+    """
+    Сравнение download_df + insert_df и load_from_s3 на локальных ClickHouse, PostgreSQL и MinIO (tests/docker)
+    """
+    s3 = config.s3
+    if s3.bucket not in s3.get_buckets():
+        s3.get_client().create_bucket(Bucket=s3.bucket)
+
+    df = DataFrame(
+        [(i, f"attr{i}") for i in range(rows)],
+        columns=config.COLUMN_NAMES,
+    )
+    s3.upload_df(df=df, object_name="bench/test.parquet")
+    s3.upload_df(df=df, object_name="bench/test.csv")
+
+    ch = config.dbs.ClickHouse
+    ch.execute(config.ch_ddl.create_test_table)
+
+    start_time = datetime.now()
+    ch.insert_df(df=s3.download_df(object_name="bench/test.parquet"), table=config.TABLE, truncate=True)
+    print(f"| {'ch download_df':>16} : {datetime.now() - start_time}")
+
+    start_time = datetime.now()
+    ch.load_from_s3(
+        table=config.TABLE,
+        source=s3,
+        object_name="bench/*.parquet",
+        endpoint_url=config.S3_DOCKER_ENDPOINT,
+        truncate=True,
+    )
+    print(f"| {'ch load_from_s3':>16} : {datetime.now() - start_time}")
+
+    ch.execute(config.ch_ddl.drop_test_table)
+
+    pg = config.dbs.PostgreSQL
+    pg.execute(config.pg_ddl.create_test_table)
+
+    start_time = datetime.now()
+    pg.insert_df(df=s3.download_df(object_name="bench/test.csv"), table=config.TABLE, truncate=True)
+    print(f"| {'pg download_df':>16} : {datetime.now() - start_time}")
+
+    start_time = datetime.now()
+    pg.load_from_s3(table=config.TABLE, source=s3, object_name="bench/test.csv", truncate=True)
+    print(f"| {'pg load_from_s3':>16} : {datetime.now() - start_time}")
+
+    pg.execute(config.pg_ddl.drop_test_table)
+    s3.delete_prefix(prefix="bench/")
+
+
+if __name__ == "__main__":
+    bench_reload_df()
+    bench_profiles()
+    bench_load_from_s3()
@@ -3,6 +3,7 @@ from collections import namedtuple
 from db_sources import ClickHouse
 from db_sources import MSSQL
 from db_sources import PostgreSQL
+from db_sources import S3
 
 TABLE = "test"
 COLUMN_NAMES = ["id", "attr"]
@@ -40,6 +41,15 @@ dbs = DBS(
     ),
 )
 
+s3 = S3(
+    endpoint_url="http://localhost:9002",
+    access_key="minio",
+    secret_key="StrongPassword1",
+    bucket="test",
+)
+# Адрес MinIO из контейнера ClickHouse (tests/docker)
+S3_DOCKER_ENDPOINT = "http://minio_test:9000"
+
 DDL = namedtuple(
     "DDL",
     [
@@ -1,8 +1,13 @@
+import zlib
+
+import pymssql
 import pytest
+from botocore.exceptions import ClientError
 from pandas import DataFrame
 
 import config
 from config import DDL
+from db_sources import ClickHouse
 from db_sources.db import DBAPI
 from db_sources.exceptions import EmptyDataError
 
@@ -75,6 +80,13 @@ class Database:
                 check_empty=True,
             )
 
+    def test_iter_df(self):
+        chunks = list(self.db.iter_df(self.ddl.select_test_table, chunksize=1))
+
+        assert all(len(chunk) == 1 for chunk in chunks)
+
+        assert [row for chunk in chunks for row in chunk.itertuples(index=False, name=None)] == self.values
+
     def test_insert_df(self):
         self.db.insert_df(df=self.df, table=config.TABLE)
 
@@ -87,6 +99,12 @@ class TestMSSQL(Database):
         self.db = config.dbs.MSSQL
         self.ddl = config.mssql_ddl
 
+    def test_iter_df_error(self):
+        with pytest.raises(pymssql.Error) as e:
+            list(self.db.iter_df("select * from not_existing_table"))
+
+        assert isinstance(e.value.args[0], str)
+
 
 class TestPostgreSQL(Database):
     def setup_method(self):
@@ -108,3 +126,237 @@ class TestClickHouse(Database):
         assert isinstance(df, DataFrame)
 
         assert list(df.itertuples(index=False, name=None)) == self.values
+
+    def test_reload_df(self):
+        self.db.execute(self.ddl.create_test_table)
+        self.db.insert(table=config.TABLE, values=[(0, "old")])
+
+        self.db.reload_df(df=self.df, table=config.TABLE, chunk_size=1)
+        data = self.db.execute_to_list(f"{self.ddl.select_test_table} order by id")
+
+        assert data == self.values
+
+        self.db.reload_from_query(
+            query=f"{self.ddl.select_test_table} where id = 1",
+            table=config.TABLE,
+        )
+        data = self.db.execute_to_list(self.ddl.select_test_table)
+
+        assert data == self.values[:1]
+
+        self.db.execute(self.ddl.drop_test_table)
+
+    def test_external_tables_columnar(self):
+        df = self.db.execute_to_df(
+            query="select * from test order by id",
+            external_tables=[(self.df, "test", [("id", "Int32"), ("attr", "String")])],
+            columnar_external_tables=True,
+            external_block_size=1,
+        )
+
+        assert list(df.itertuples(index=False, name=None)) == self.values
+
+    def test_server_side_params(self):
+        data = self.db.execute_to_list(
+            "select {id:Int32}, {attr:String}",
+            params={"id": 1, "attr": "attr1"},
+            server_side_params=True,
+            use_query_cache=True,
+            query_cache_ttl=60,
+        )
+
+        assert data == self.values[:1]
+
+    def test_upsert_df(self):
+        partitions = self.db.upsert_df(df=self.df, table="test_upsert", create_table=True, order_by=["id"])
+        self.db.upsert_df(df=self.df.assign(attr="new"), table="test_upsert", optimize=True)
+
+        assert partitions == ["all"]
+
+        for method in ("final", "argmax"):
+            df = self.db.read_latest_df(
+                table="test_upsert",
+                columns=config.COLUMN_NAMES,
+                method=method,
+            ).sort_values("id")
+
+            assert df["attr"].tolist() == ["new", "new"]
+
+        self.db.execute("drop table test_upsert")
+
+
+class TestClickHouseSharding:
+    shards = [
+        {"shard_num": 1, "shard_weight": 1, "host": "shard1", "port": 9000},
+        {"shard_num": 2, "shard_weight": 2, "host": "shard2", "port": 9000},
+    ]
+
+    @pytest.mark.parametrize(
+        ("value", "slot"),
+        [(0, 0), (1, 1), (2, 2), (3, 0), (5, 2), (-1, 0), (2 ** 64 + 1, 1)],
+    )
+    def test_shard_slot_int(self, value, slot):
+        assert ClickHouse._shard_slot(value, 3) == slot
+
+    def test_shard_slot_deterministic(self):
+        for value in ("key", "ключ", 1.5, None):
+            slot = ClickHouse._shard_slot(value, 7)
+
+            assert slot == ClickHouse._shard_slot(value, 7)
+
+            assert slot == zlib.crc32(str(value).encode()) % 7
+
+    def test_insert_sharded(self, monkeypatch):
+        inserted = {}
+
+        def insert(db, table, values, columns, schema, wait_after_insert):
+            inserted[db.host] = values
+
+        monkeypatch.setattr(ClickHouse, "get_cluster_shards", lambda db, cluster: self.shards)
+        monkeypatch.setattr(ClickHouse, "insert", insert)
+
+        df = DataFrame([(i, f"attr{i}") for i in range(6)], columns=config.COLUMN_NAMES)
+        ClickHouse(host="localhost").insert_df_sharded(
+            df=df,
+            table=config.TABLE,
+            sharding_key="id",
+            cluster="cluster",
+            wait_after_insert=0,
+        )
+
+        # веса 1 и 2: слот 0 - первый шард, слоты 1 и 2 - второй
+        assert inserted == {
+            "shard1": [[0, "attr0"], [3, "attr3"]],
+            "shard2": [[1, "attr1"], [2, "attr2"], [4, "attr4"], [5, "attr5"]],
+        }
+
+
+class TestProvideQuery:
+    def test_secrets_masked(self, capsys):
+        ClickHouse(host="localhost", provide_query=True)._provide_query_info(
+            query="select * from dblink('host=pg password=conninfo_pw', 'q'), postgresql(%(password)s, %(secret_key)s)",
+            params={"password": "param_pw", "secret_key": "param_key"},
+        )
+        output = capsys.readouterr().out
+
+        assert "******" in output
+
+        assert not any(secret in output for secret in ("conninfo_pw", "param_pw", "param_key"))
+
+
+class TestS3:
+    s3 = config.s3
+
+    @pytest.fixture(autouse=True, scope="class")
+    @classmethod
+    def bucket(cls):
+        client = cls.s3.get_client()
+        if cls.s3.bucket not in [bucket["Name"] for bucket in client.list_buckets()["Buckets"]]:
+            client.create_bucket(Bucket=cls.s3.bucket)
+
+    def test_export_query_leading_null_chunk(self):
+        class Source:
+            @staticmethod
+            def iter_df(query, params, chunksize):
+                yield DataFrame({"id": [1, 2], "attr": [None, None]})
+                yield DataFrame({"id": [3, 4], "attr": ["attr3", None]})
+
+        files = self.s3.export_query(source=Source(), query="", prefix="test_export")
+        df = self.s3.download_df(object_name=files[0]["key"])
+        self.s3.delete_prefix(prefix="test_export/")
+
+        assert [file["rows"] for file in files] == [4]
+
+        assert df["attr"].fillna("").tolist() == ["", "", "attr3", ""]
+
+    def test_pagination_and_delete_batches(self, monkeypatch):
+        keys = [f"test_pagination/{i:04d}" for i in range(1100)]
+        results = self.s3.upload_many({key: b"" for key in keys})
+
+        assert all(result["status"] == "ok" for result in results)
+
+        assert [obj["key"] for obj in self.s3.iter_objects(prefix="test_pagination/")] == keys
+
+        client = self.s3.get_client()
+        delete_objects = client.delete_objects
+        batch_sizes = []
+
+        def delete_objects_spy(**kwargs):
+            batch_sizes.append(len(kwargs["Delete"]["Objects"]))
+            return delete_objects(**kwargs)
+
+        monkeypatch.setattr(client, "delete_objects", delete_objects_spy)
+        errors = self.s3.delete_prefix(prefix="test_pagination/")
+
+        assert errors == []
+
+        assert sorted(batch_sizes) == [100, 1000]
+
+        assert list(self.s3.iter_objects(prefix="test_pagination/")) == []
+
+    def test_open_write_multipart(self):
+        data = bytes(range(256)) * (11 * 1024 * 1024 // 256)
+        with self.s3.open_write(object_name="test_multipart", part_size=5 * 1024 * 1024) as file:
+            for i in range(0, len(data), 1024 * 1024):
+                file.write(data[i:i + 1024 * 1024])
+
+        with self.s3.open_read(object_name="test_multipart") as body:
+            assert body.read() == data
+
+        self.s3.delete(object_name="test_multipart")
+
+    def test_open_write_abort(self):
+        with pytest.raises(RuntimeError):
+            with self.s3.open_write(object_name="test_abort", part_size=5 * 1024 * 1024) as file:
+                file.write(b"0" * 6 * 1024 * 1024)
+                raise RuntimeError
+
+        client = self.s3.get_client()
+
+        assert list(self.s3.iter_objects(prefix="test_abort")) == []
+
+        assert client.list_multipart_uploads(Bucket=self.s3.bucket, Prefix="test_abort").get("Uploads", []) == []
+
+    def test_upload_many_retries(self, monkeypatch):
+        upload = self.s3.upload
+        failures = {"test_retry/1": 2}
+
+        def flaky_upload(file, object_name, bucket):
+            if failures.get(object_name):
+                failures[object_name] -= 1
+                raise ClientError({"Error": {"Code": "SlowDown"}}, "PutObject")
+            return upload(file=file, object_name=object_name, bucket=bucket)
+
+        monkeypatch.setattr(self.s3, "upload", flaky_upload)
+        monkeypatch.setattr("db_sources.storage.s3.time.sleep", lambda seconds: None)
+        results = self.s3.upload_many({"test_retry/0": b"0", "test_retry/1": b"1"}, retries=3)
+        self.s3.delete_prefix(prefix="test_retry/")
+
+        assert [(result["status"], result["attempts"]) for result in results] == [("ok", 1), ("ok", 3)]
+
+    @pytest.mark.parametrize("delete_source", [False, True])
+    def test_copy_prefix(self, delete_source):
+        self.s3.upload_many({"test_copy/a": b"a", "test_copy/b/c": b"c"})
+        results = self.s3.copy_prefix(
+            source_prefix="test_copy/",
+            prefix="test_copied/",
+            delete_source=delete_source,
+        )
+        copied = [obj["key"] for obj in self.s3.iter_objects(prefix="test_copied/")]
+        source = [obj["key"] for obj in self.s3.iter_objects(prefix="test_copy/")]
+        with self.s3.open_read(object_name="test_copied/b/c") as body:
+            data = body.read()
+        self.s3.delete_prefix(prefix="test_copied/")
+        self.s3.delete_prefix(prefix="test_copy/")
+
+        assert [result["status"] for result in results] == ["ok", "ok"]
+
+        assert copied == ["test_copied/a", "test_copied/b/c"]
+
+        assert source == ([] if delete_source else ["test_copy/a", "test_copy/b/c"])
+
+        assert data == b"c"
+
+    def test_copy_prefix_nested(self):
+        with pytest.raises(ValueError):
+            self.s3.copy_prefix(source_prefix="test_copy/", prefix="test_copy/archive/")